@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+import db
+from exhibitor_parser import parse_exhibitor_html
+from http_fetch import USER_AGENT
+from metrics import METRICS, log_summary, start_from_env
+from page_cache import default_cache
+from routing import scheduler_from_env
+from write_buffer import ExhibitorDataBuffer
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter(object):
+    # spaces requests to the same host at least 1/rate seconds apart
+
+    def __init__(self, rate=0):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        now = asyncio.get_event_loop().time()
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class RetryableStatus(Exception):
+    pass
+
+
+class AsyncCrawler(object):
+    # with a scheduler concurrency is the upper bound, the scheduler keeps every
+    # endpoint below it while the site throttles and spreads requests over its routes
+
+    def __init__(self, concurrency=10, rate_limit=0, retries=3, backoff=0.5, timeout=30, cache=None, scheduler=None):
+        self.concurrency = concurrency
+        self.cache = cache
+        self.rate_limiter = HostRateLimiter(rate_limit)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.route_sessions = {}
+
+    async def fetch_response(self, session, url, headers=None):
+        # returns (status, headers, body), retries connection errors and RETRY_STATUSES
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            await self.rate_limiter.wait(host)
+            ticket = proxy = status = None
+            if self.scheduler is not None:
+                ticket = await self.scheduler.acquire_async(url)
+                session = self.route_sessions.get(ticket.route.name, session)
+                proxy = ticket.route.proxy
+            try:
+                with METRICS.timer('page_load', fetcher='async'):
+                    async with session.get(url, headers=headers, proxy=proxy) as response:
+                        status = response.status
+                        if response.status in RETRY_STATUSES:
+                            raise RetryableStatus('{} returned {}'.format(url, response.status))
+                        response.raise_for_status()
+                        body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError, RetryableStatus) as e:
+                # a body cut off by the timeout fails the route even after the status arrived
+                self.release(ticket, status, failed=status is None or isinstance(e, asyncio.TimeoutError))
+                if attempt == self.retries:
+                    result = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'error'
+                    METRICS.increment('scrape_pages_total', fetcher='async', result=result)
+                    raise
+                METRICS.increment('scrape_retries_total', fetcher='async')
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+            except BaseException:
+                # cancelled workers still give their slot back
+                self.release(ticket, failed=True)
+                raise
+            else:
+                self.release(ticket, status)
+                return status, response.headers, body
+
+    def release(self, ticket, status=None, failed=False):
+        if ticket is not None:
+            self.scheduler.release(ticket, status, failed)
+
+    async def fetch(self, session, url, parse):
+        # returns parse(body), only a body that parses is cached: a blank or
+        # throttled page is fetched again instead of being served from the cache
+        if self.cache is not None:
+            body = self.cache.get(url)
+            if body is not None:
+                result = parse(body)
+                if result is not None:
+                    return result
+
+        _, _, body = await self.fetch_response(session, url)
+        result = parse(body)
+        if result is not None and self.cache is not None:
+            self.cache.put(url, body)
+        return result
+
+    def parse(self, body):
+        with METRICS.timer('field_extraction', fetcher='async'):
+            return parse_exhibitor_html(body)
+
+    async def worker(self, session, queue, on_result):
+        while True:
+            url = await queue.get()
+            try:
+                product = await self.fetch(session, url, self.parse)
+                METRICS.increment('scrape_pages_total', page='exhibitor', fetcher='async', result='success' if product else 'needs_browser')
+            except Exception as e:
+                logger.warning('--> Product failed {}: {!r}'.format(url, e))
+            else:
+                on_result(url, product)
+            finally:
+                queue.task_done()
+
+    async def crawl(self, jobs, on_result):
+        # on_result(url, product) is called as soon as each page is parsed,
+        # product is None when the raw html has no content block
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {'User-Agent': USER_AGENT}
+
+        def client_session():
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+
+        # every route keeps its own cookies and connections
+        if self.scheduler is not None:
+            self.route_sessions = {route.name: client_session() for route in self.scheduler.routes}
+        try:
+            async with client_session() as session:
+                workers = [
+                    asyncio.ensure_future(self.worker(session, queue, on_result))
+                    for _ in range(self.concurrency)
+                ]
+                await queue.join()
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            for route_session in self.route_sessions.values():
+                await route_session.close()
+            self.route_sessions = {}
+
+    def run(self, jobs, on_result):
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.crawl(jobs, on_result))
+
+
+def crawl_pending(crawler):
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            urls = db.select_pending_urls(cursor)
+        connection.commit()
+
+        with ExhibitorDataBuffer(connection) as buffer:
+            buffer.start_timer()
+
+            def on_result(url, product):
+                if product is None:
+                    # leave it for the selenium pass
+                    logger.warning('--> Product needs a browser {}'.format(url))
+                    return
+                buffer.add_product(url, product)
+
+            crawler.run(urls, on_result)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests per second per host, 0 is unlimited')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    start_from_env()
+    crawl_pending(AsyncCrawler(
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        retries=args.retries,
+        backoff=args.backoff,
+        cache=default_cache(),
+        scheduler=scheduler_from_env(),
+    ))
+    log_summary()
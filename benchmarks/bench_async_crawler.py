@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+# Throughput of AsyncCrawler against the mock site with artificial latency.
+# Pages/sec should grow with concurrency until the per-host rate limit caps it.
+#
+#   python benchmarks/bench_async_crawler.py --pages 400 --latency 0.1
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from async_crawler import AsyncCrawler
+from mock_site import start_server, server_url
+
+
+def run(base_url, pages, concurrency, rate_limit):
+    urls = ['{}/exhibitor.html?id={}'.format(base_url, page_id) for page_id in range(pages)]
+    results = []
+
+    crawler = AsyncCrawler(concurrency=concurrency, rate_limit=rate_limit)
+    started = time.time()
+    crawler.run(urls, lambda url, product: results.append(product))
+    elapsed = time.time() - started
+
+    assert len(results) == pages and all(results)
+    return pages / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=0.1)
+    parser.add_argument('--rate-limit', type=float, default=50)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency)
+    base_url = server_url(server)
+
+    print('latency {:.3f}s, {} pages'.format(args.latency, args.pages))
+    print('{:>12} {:>12} {:>12}'.format('concurrency', 'rate limit', 'pages/sec'))
+    for rate_limit in (0, args.rate_limit):
+        for concurrency in (1, 2, 4, 8, 16, 32):
+            pages_per_sec = run(base_url, args.pages, concurrency, rate_limit)
+            print('{:>12} {:>12} {:>12.1f}'.format(concurrency, rate_limit or '-', pages_per_sec))
+
+    server.shutdown()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Rows/sec of per-row commits against the batched write buffers on a local
+# PostgreSQL. Works in a throwaway schema, the real exhibitor table is untouched.
+#
+#   python benchmarks/bench_db_writes.py --rows 20000
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import db
+from write_buffer import DATA_COLUMNS, ExhibitorDataBuffer, ExhibitorLinkBuffer
+
+SCHEMA = 'bench_db_writes'
+
+
+def make_links(rows):
+    return ['http://i.cantonfair.org.cn/en/Company/Index?corpid={}'.format(i) for i in range(rows)]
+
+
+def make_product(i):
+    return {column: '{} {}'.format(column, i) for column in DATA_COLUMNS}
+
+
+def reset_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('TRUNCATE "exhibitor";')
+    connection.commit()
+
+
+def bench_links_per_row(connection, links):
+    with connection.cursor() as cursor:
+        for link in links:
+            db.upsert_exhibitor_link(cursor, link, 1)
+            connection.commit()
+
+
+def bench_links_buffered(connection, links, flush_rows):
+    with ExhibitorLinkBuffer(connection, flush_rows=flush_rows) as buffer:
+        for link in links:
+            buffer.add_link(link, 1, 'Category')
+
+
+def bench_data_per_row(connection, links):
+    with connection.cursor() as cursor:
+        for i, link in enumerate(links):
+            db.update_exhibitor(cursor, link, make_product(i))
+            connection.commit()
+
+
+def bench_data_buffered(connection, links, flush_rows):
+    with ExhibitorDataBuffer(connection, flush_rows=flush_rows) as buffer:
+        for i, link in enumerate(links):
+            buffer.add_product(link, make_product(i))
+
+
+def timed(function, *args):
+    started = time.time()
+    function(*args)
+    return time.time() - started
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--flush-rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    links = make_links(args.rows)
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};'.format(schema=SCHEMA))
+            cursor.execute('CREATE TABLE {schema}.exhibitor (LIKE public.exhibitor INCLUDING ALL);'.format(schema=SCHEMA))
+            cursor.execute('CREATE TABLE {schema}.category (LIKE public.category INCLUDING ALL);'.format(schema=SCHEMA))
+            cursor.execute("INSERT INTO {schema}.category (id, url) VALUES (1, 'http://localhost/category');".format(schema=SCHEMA))
+            cursor.execute('SET search_path TO {schema}, public;'.format(schema=SCHEMA))
+        connection.commit()
+
+        try:
+            results = []
+
+            reset_table(connection)
+            results.append(('links, per-row commit', timed(bench_links_per_row, connection, links)))
+            results.append(('data, per-row commit', timed(bench_data_per_row, connection, links)))
+
+            reset_table(connection)
+            results.append(('links, buffered', timed(bench_links_buffered, connection, links, args.flush_rows)))
+            results.append(('data, buffered', timed(bench_data_buffered, connection, links, args.flush_rows)))
+
+            print('{} rows, flush every {} rows'.format(args.rows, args.flush_rows))
+            print('{:<24} {:>10} {:>12}'.format('path', 'seconds', 'rows/sec'))
+            for name, elapsed in results:
+                print('{:<24} {:>10.2f} {:>12.0f}'.format(name, elapsed, args.rows / elapsed))
+        finally:
+            connection.rollback()
+            with connection.cursor() as cursor:
+                cursor.execute('DROP SCHEMA {schema} CASCADE;'.format(schema=SCHEMA))
+            connection.commit()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Time, size and peak RSS of each CSV export mode and of the parquet / ndjson
+# exporters on a synthetic exhibitor table.
+# Every mode runs in its own process so the RSS numbers do not mix.
+#
+#   python benchmarks/bench_export.py --rows 1000000
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+import db
+import export_csv
+import exporters
+
+SCHEMA = 'bench_export'
+SEARCH_PATH = '-c search_path={},public'.format(SCHEMA)
+
+# exporters.py formats, format-compression
+EXPORTER_MODES = ('parquet-snappy', 'parquet-zstd', 'ndjson-gzip', 'ndjson-zstd')
+
+
+def create_table(rows):
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};'.format(schema=SCHEMA))
+            cursor.execute('CREATE TABLE {schema}.exhibitor (LIKE public.exhibitor INCLUDING ALL);'.format(schema=SCHEMA))
+            cursor.execute('CREATE TABLE {schema}.category (LIKE public.category INCLUDING ALL);'.format(schema=SCHEMA))
+            cursor.execute("INSERT INTO {schema}.category (id, url, name) VALUES (1, 'http://localhost/category', 'Household Items');".format(schema=SCHEMA))
+            cursor.execute("""
+                INSERT INTO {schema}.exhibitor (
+                    "url", "is_done", "company_name", "address", "city_province", "post_code",
+                    "website", "main_products", "international_commercial_terms", "exhibition_records",
+                    "number_of_staff", "registered_capital", "business_type", "target_customer", "category_id",
+                    "registered_capital_yuan", "staff_min", "staff_max", "changed_at"
+                )
+                SELECT
+                    'http://i.cantonfair.org.cn/en/Company/Index?corpid=' || i,
+                    true,
+                    'Ningbo O''Example Household Products Co., Ltd. ' || i,
+                    'No. ' || i || ', Example Road, Yinzhou District,',
+                    'Zhejiang',
+                    '315100',
+                    'www.example' || i || '.com',
+                    'Kitchenware, Storage Boxes, Cups',
+                    'OEM, ODM',
+                    '121st, 122nd',
+                    '201-500People',
+                    (i * 1000) || ' YUAN',
+                    'Manufacturer',
+                    'Wholesaler, Retailer',
+                    1,
+                    i * 1000,
+                    201,
+                    500,
+                    now()
+                FROM generate_series(1, %s) AS i;
+            """.format(schema=SCHEMA), (rows,))
+            cursor.execute('ANALYZE {schema}.exhibitor;'.format(schema=SCHEMA))
+        connection.commit()
+
+
+def drop_table():
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA {schema} CASCADE;'.format(schema=SCHEMA))
+        connection.commit()
+
+
+def run_child(mode, output):
+    started = time.time()
+    with db.connect(options=SEARCH_PATH) as connection:
+        if mode in EXPORTER_MODES:
+            export_format, _, compression = mode.partition('-')
+            exporters.export(connection, exporters.make_exporter(export_format, output, compression))
+        else:
+            with open(output, 'w', encoding='utf-8') as write_file:
+                export_csv.write_csv(connection, write_file, mode)
+    elapsed = time.time() - started
+    # ru_maxrss is in kilobytes on linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps({'mode': mode, 'seconds': elapsed, 'peak_rss': peak_rss, 'bytes': os.path.getsize(output)}))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--output', default='/tmp/bench_export.csv')
+    parser.add_argument('--child', choices=export_csv.EXPORT_MODES + EXPORTER_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.output)
+        sys.exit(0)
+
+    create_table(args.rows)
+    try:
+        print('{} rows'.format(args.rows))
+        print('{:<16} {:>10} {:>12} {:>10} {:>14}'.format('mode', 'seconds', 'rows/sec', 'MiB', 'peak RSS MiB'))
+        for mode in ('python', 'cursor', 'copy') + EXPORTER_MODES:
+            output = subprocess.check_output([sys.executable, __file__, '--child', mode, '--output', args.output])
+            result = json.loads(output.decode('utf-8'))
+            print('{:<16} {:>10.2f} {:>12.0f} {:>10.1f} {:>14.1f}'.format(
+                mode, result['seconds'], args.rows / result['seconds'], result['bytes'] / 2 ** 20, result['peak_rss'] / 2 ** 20,
+            ))
+    finally:
+        drop_table()
+        if os.path.exists(args.output):
+            os.remove(args.output)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+# Pages/sec of the exhibitor parser on fixture html, in one process and spread
+# over a process pool, with the per-core rate for each pool size.
+#
+#   python benchmarks/bench_parser.py --pages 20000
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+from exhibitor_parser import parse_exhibitor_html
+from offline_parser import directory_jobs, parse_pages
+
+FIXTURE = os.path.join(BASE_PATH, 'fixtures', 'exhibitor.html')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'rb') as fixture_file:
+        page = fixture_file.read()
+
+    started = time.time()
+    for _ in range(args.pages):
+        parse_exhibitor_html(page)
+    single = args.pages / (time.time() - started)
+
+    # the pool reads the pages from disk like it does from the cache
+    directory = tempfile.mkdtemp()
+    try:
+        for i in range(args.pages):
+            with open(os.path.join(directory, '{:06d}.html'.format(i)), 'wb') as page_file:
+                page_file.write(page)
+
+        print('{} pages, {} cpus'.format(args.pages, os.cpu_count()))
+        print('{:>8} {:>12} {:>16}'.format('workers', 'pages/sec', 'pages/sec/core'))
+        print('{:>8} {:>12.0f} {:>16.0f}'.format('inline', single, single))
+
+        workers = 1
+        while workers <= os.cpu_count():
+            started = time.time()
+            parsed = parse_pages(directory_jobs(directory), lambda url, product: None, workers, args.batch_size)
+            rate = parsed / (time.time() - started)
+            print('{:>8} {:>12.0f} {:>16.0f}'.format(workers, rate, rate / workers))
+            workers *= 2
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+# Cost of the hot exhibitor queries on a synthetic table: claiming pending rows,
+# listing them, and the CSV export query. Claims are measured without and with
+# the partial index on pending rows, the export with the old text schema
+# (regex cleanup, repeated category names) and the migrated one.
+#
+#   python benchmarks/bench_queries.py --rows 1000000 --pending 0.05
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+import db
+import export_csv
+
+SCHEMA = 'bench_queries'
+
+LEGACY_EXPORT_SQL = """
+    SELECT
+        replace(btrim(coalesce("company_name", ''), ','), '''', ''),
+        replace(btrim(coalesce("city_province", ''), ','), '''', ''),
+        replace(btrim(coalesce("website", ''), ','), '''', ''),
+        replace(btrim(coalesce("main_products", ''), ','), '''', ''),
+        replace(btrim(coalesce("address", ''), ','), '''', ''),
+        replace(btrim(coalesce("post_code", ''), ','), '''', ''),
+        replace(btrim(coalesce("business_type", ''), ','), '''', ''),
+        replace(btrim(coalesce("category_name", ''), ','), '''', ''),
+        replace(btrim(coalesce("exhibition_records", ''), ','), '''', ''),
+        replace(btrim(coalesce("international_commercial_terms", ''), ','), '''', ''),
+        replace(btrim(coalesce("number_of_staff", ''), ','), 'People', ''),
+        regexp_replace(coalesce("registered_capital", ''), '[^0-9]', '', 'g'),
+        replace(btrim(coalesce("target_customer", ''), ','), '''', ''),
+        replace(btrim(coalesce("url", ''), ','), '''', '')
+    FROM "exhibitor_legacy"
+    WHERE is_done = TRUE
+"""
+
+
+def create_tables(cursor, rows, pending):
+    # the queue is worked in id order, so the pending rows are the newest ones
+    cursor.execute('DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};'.format(schema=SCHEMA))
+    cursor.execute('SET search_path TO {schema}, public;'.format(schema=SCHEMA))
+    # no indexes copied, the pending index is created between the two claim runs
+    cursor.execute('CREATE TABLE "exhibitor" (LIKE public.exhibitor INCLUDING DEFAULTS);')
+    cursor.execute('CREATE TABLE "category" (LIKE public.category INCLUDING ALL);')
+    cursor.execute("""
+        INSERT INTO "category" ("id", "url", "name")
+        SELECT i, 'http://localhost/category/' || i, 'Category ' || i FROM generate_series(1, 50) AS i;
+    """)
+    cursor.execute("""
+        INSERT INTO "exhibitor" (
+            "url", "is_done", "company_name", "address", "city_province", "post_code",
+            "website", "main_products", "international_commercial_terms", "exhibition_records",
+            "number_of_staff", "registered_capital", "business_type", "target_customer", "category_id",
+            "registered_capital_yuan", "staff_min", "staff_max"
+        )
+        SELECT
+            'http://i.cantonfair.org.cn/en/Company/Index?corpid=' || i,
+            i <= %s,
+            'Ningbo Example Household Products Co., Ltd. ' || i,
+            'No. ' || i || ', Example Road, Yinzhou District,',
+            'Zhejiang',
+            '315100',
+            'www.example' || i || '.com',
+            'Kitchenware, Storage Boxes, Cups',
+            'OEM, ODM',
+            '121st, 122nd',
+            '201-500People',
+            (i * 1000) || ' YUAN',
+            'Manufacturer',
+            'Wholesaler, Retailer',
+            1 + i %% 50,
+            i * 1000,
+            201,
+            500
+        FROM generate_series(1, %s) AS i;
+    """, (int(rows * (1 - pending)), rows))
+    cursor.execute('ALTER TABLE "exhibitor" ADD PRIMARY KEY ("id");')
+    cursor.execute("""
+        CREATE TABLE "exhibitor_legacy" AS
+        SELECT "exhibitor".*, "category"."name" AS "category_name"
+        FROM "exhibitor" LEFT JOIN "category" ON "category"."id" = "exhibitor"."category_id";
+    """)
+    cursor.execute('ANALYZE;')
+
+
+def time_claims(connection, claims, batch_size):
+    # every claim runs in its own transaction and is rolled back, the queue stays the same
+    timings = []
+    for _ in range(claims):
+        started = time.time()
+        with connection.cursor() as cursor:
+            db.claim_pending_urls(cursor, batch_size)
+        timings.append(time.time() - started)
+        connection.rollback()
+    return timings
+
+
+def time_query(connection, function):
+    started = time.time()
+    with connection.cursor() as cursor:
+        function(cursor)
+    connection.rollback()
+    return time.time() - started
+
+
+def copy_to_null(sql_string):
+    def run(cursor):
+        with open(os.devnull, 'w') as null_file:
+            cursor.copy_expert('COPY ({}) TO STDOUT WITH (FORMAT csv)'.format(sql_string), null_file)
+    return run
+
+
+def print_row(name, seconds):
+    print('{:<36} {:>12.2f}'.format(name, seconds * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--pending', type=float, default=0.05, help='share of rows with is_done = false')
+    parser.add_argument('--claims', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=10)
+    args = parser.parse_args()
+
+    with db.connect(options='-c search_path={},public'.format(SCHEMA)) as connection:
+        with connection.cursor() as cursor:
+            create_tables(cursor, args.rows, args.pending)
+        connection.commit()
+
+        try:
+            print('{} rows, {:.0%} pending, claims of {} rows'.format(args.rows, args.pending, args.batch_size))
+            print('{:<36} {:>12}'.format('query', 'ms'))
+
+            for indexed in (False, True):
+                if indexed:
+                    with connection.cursor() as cursor:
+                        cursor.execute('CREATE INDEX ON "exhibitor" ("id") WHERE is_done = false;')
+                        cursor.execute('ANALYZE "exhibitor";')
+                    connection.commit()
+                label = 'pending index' if indexed else 'no pending index'
+
+                timings = time_claims(connection, args.claims, args.batch_size)
+                print_row('claim, median ({})'.format(label), statistics.median(timings))
+                print_row('claim, p95 ({})'.format(label), sorted(timings)[int(0.95 * (len(timings) - 1))])
+                print_row('select pending ({})'.format(label), time_query(connection, db.select_pending_urls))
+
+            print_row('export, text schema', time_query(connection, copy_to_null(LEGACY_EXPORT_SQL)))
+            print_row('export, migrated schema', time_query(connection, copy_to_null(export_csv.EXPORT_SQL)))
+        finally:
+            connection.rollback()
+            with connection.cursor() as cursor:
+                cursor.execute('DROP SCHEMA {schema} CASCADE;'.format(schema=SCHEMA))
+            connection.commit()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# Median and p95 seconds per detail page in Selenium mode, the old profile
+# (full page load, every asset fetched, one find_element per field) against
+# the tuned one (eager load, images / css / fonts / third party hosts blocked,
+# all fields read in a single execute_script). css and fonts are only blocked
+# with a chromedriver that speaks CDP, block_urls logs a warning otherwise.
+#
+#   python benchmarks/bench_selenium.py --pages 100 --latency 0.05
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser import make_driver, read_exhibitor_fields
+from exhibitor_parser import EXHIBITOR_FIELDS
+from mock_site import server_url, start_server
+
+
+def read_fields_one_by_one(driver):
+    return {key: driver.find_element_by_id(element_id).text for key, element_id in EXHIBITOR_FIELDS}
+
+
+def time_pages(driver, url, pages, read_fields):
+    timings = []
+    for i in range(pages):
+        started = time.time()
+        driver.get('{}?id={}'.format(url, i))
+        WebDriverWait(driver, 5*60).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, '#content .cright'))
+        )
+        product = read_fields(driver)
+        timings.append(time.time() - started)
+        assert product['company_name'], 'fields were not read'
+    return timings
+
+
+def percentile(timings, q):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every response, assets included')
+    parser.add_argument('--asset-size', type=int, default=50000)
+    parser.add_argument('--grid', default=None, help='Selenium Grid hub url, local chromedriver if empty')
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, asset_size=args.asset_size)
+    url = '{}/exhibitor_full.html'.format(server_url(server))
+
+    profiles = (
+        ('before', False, read_fields_one_by_one),
+        ('after', True, read_exhibitor_fields),
+    )
+    print('{} pages, {}s latency'.format(args.pages, args.latency))
+    print('{:>8} {:>10} {:>10} {:>12}'.format('profile', 'median', 'p95', 'pages/sec'))
+    for name, tuned, read_fields in profiles:
+        driver = make_driver(args.grid, tuned=tuned)
+        try:
+            # first load warms up the browser, not counted
+            time_pages(driver, url, 1, read_fields)
+            timings = time_pages(driver, url, args.pages, read_fields)
+        finally:
+            driver.quit()
+        print('{:>8} {:>9.3f}s {:>9.3f}s {:>12.1f}'.format(
+            name, statistics.median(timings), percentile(timings, 0.95), len(timings) / sum(timings),
+        ))
+    server.shutdown()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# Sustained throughput against a mock site that throttles on purpose: past
+# --capacity requests in flight it stalls for --stall seconds, then answers 503.
+# A fixed concurrency above the capacity spends its slots on stalls, the
+# RequestScheduler backs the endpoint off to what the site serves and stays there.
+#
+#   python benchmarks/bench_throttling.py --pages 600 --capacity 8 --concurrency 32
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from async_crawler import AsyncCrawler
+from mock_site import DETAIL_PATH, server_url, start_server
+from routing import RequestScheduler, Route
+
+
+def run(server, pages, concurrency, scheduler, args):
+    urls = ['{}{}?corpid={}'.format(server_url(server), DETAIL_PATH, page_id) for page_id in range(pages)]
+    results = []
+
+    throttled = server.throttled
+    crawler = AsyncCrawler(
+        concurrency=concurrency,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+        scheduler=scheduler,
+    )
+    started = time.time()
+    crawler.run(urls, lambda url, product: results.append(product))
+    elapsed = time.time() - started
+
+    done = sum(1 for product in results if product)
+    limits = scheduler.limits() if scheduler else {}
+    return {
+        'seconds': elapsed,
+        'pages_per_sec': done / elapsed,
+        'failed': pages - done,
+        'throttled': server.throttled - throttled,
+        'limit': max(limits.values()) if limits else None,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=600)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--capacity', type=int, default=8, help='requests the mock site serves at once')
+    parser.add_argument('--stall', type=float, default=2, help='seconds a request over capacity hangs')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--routes', type=int, default=1, help='direct sessions the scheduler rotates over')
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--backoff', type=float, default=0.1)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, capacity=args.capacity, stall=args.stall)
+
+    def scheduler():
+        routes = [Route('direct-{}'.format(i)) for i in range(args.routes)]
+        # the mock throttles the whole host, no route is worse than another
+        return RequestScheduler(routes, max_limit=args.concurrency, quarantine=args.stall)
+
+    modes = [
+        ('fixed {}'.format(args.concurrency), args.concurrency, lambda: None),
+        ('fixed {} (capacity)'.format(args.capacity), args.capacity, lambda: None),
+        ('aimd <= {}'.format(args.concurrency), args.concurrency, scheduler),
+    ]
+
+    print('{} pages, {}s latency, capacity {}, {}s stall'.format(args.pages, args.latency, args.capacity, args.stall))
+    print('{:<22} {:>10} {:>10} {:>8} {:>10} {:>8}'.format('mode', 'seconds', 'pages/sec', 'failed', 'throttled', 'limit'))
+    for name, concurrency, make_scheduler in modes:
+        result = run(server, args.pages, concurrency, make_scheduler(), args)
+        print('{:<22} {:>10.2f} {:>10.1f} {:>8} {:>10} {:>8}'.format(
+            name, result['seconds'], result['pages_per_sec'], result['failed'], result['throttled'],
+            '-' if result['limit'] is None else '{:.1f}'.format(result['limit']),
+        ))
+
+    server.shutdown()
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+# Local stand-in for i.cantonfair.org.cn, serves the saved pages from fixtures/
+#
+#   python benchmarks/mock_site.py --port 8000
+#   python http_fetch.py http://localhost:8000/exhibitor.html
+#
+# /en/SearchResult/Index?CategoryNo=N&PageIndex=M is a generated listing page,
+# /en/Company/Index?corpid=X a generated exhibitor detail page,
+# /assets/<name> is filler content of the type its extension says (css, fonts, images)
+#
+# --capacity N throttles on purpose: a request arriving while N are in flight is
+# held for --stall seconds and answered with 503, like the real site under load
+
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+FIXTURES_PATH = os.path.join(BASE_PATH, 'fixtures')
+
+LISTING_PATH = '/en/SearchResult/Index'
+DETAIL_PATH = '/en/Company/Index'
+ASSETS_PATH = '/assets/'
+
+ASSET_TYPES = {
+    '.css': 'text/css',
+    '.js': 'application/javascript',
+    '.woff': 'font/woff',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+}
+
+LISTING_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Search Result - Canton Fair</title></head>
+<body>
+<div id="curmb"><a href="#">Category {category_no}</a></div>
+<div id="gjh_pro_result">
+<div class="czs-list">
+{items}
+</div>
+</div>
+<div id="pagearea"><span class="pagenumber">{pages}</span></div>
+</body>
+</html>
+'''
+
+LISTING_ITEM = '<div class="min"><dl><dt><a target="_blank" href="/en/Company/Index?corpid={category_no}-{page_id}-{item}">Exhibitor {item}</a></dt></dl></div>'
+
+DETAIL_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Exhibitor - Canton Fair</title></head>
+<body>
+<div id="content">
+  <div class="cleft"></div>
+  <div class="cright">
+    <ul class="exhibitor-info">
+      <li>Company Name: <span id="Exhi_Name">Example Household Products Co., Ltd. {corpid}</span></li>
+      <li>Address: <span id="Exhi_Address">No. {number}, Example Road, Yinzhou District</span></li>
+      <li>City/Province: <span id="Exhi_Province">Zhejiang</span></li>
+      <li>Post Code: <span id="Exhi_ZipCode">315100</span></li>
+      <li>Website: <span id="Exhi_WebSite">www.example{number}.com</span></li>
+      <li>Main Products: <span id="Exhi_KeyWord">Kitchenware, Storage Boxes, Cups</span></li>
+      <li>Business Type: <span id="Exhi_TypeName">Manufacturer</span></li>
+      <li>International Commercial Terms: <span id="Exhi_OEMode">OEM, ODM</span></li>
+      <li>Exhibition Records: <span id="Exhi_Record">121st, 122nd</span></li>
+      <li>Number of Staff: <span id="Exhi_PeopleNum">201-500People</span></li>
+      <li>Registered Capital: <span id="Exhi_ExhFund">{capital:,} YUAN</span></li>
+      <li>Target Customer: <span id="Exhi_BuyerType">Wholesaler, Retailer</span></li>
+    </ul>
+  </div>
+</div>
+<div id="footer">{padding}</div>
+</body>
+</html>
+'''
+
+
+class MockSiteHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if not self.server.capacity:
+            return self.serve_get()
+
+        # a rejected request hangs without taking a slot of the ones being served
+        if self.server.enter() > self.server.capacity:
+            self.server.leave()
+            time.sleep(self.server.stall)
+            self.etag = None
+            return self.send_error(503)
+        try:
+            return self.serve_get()
+        finally:
+            self.server.leave()
+
+    def serve_get(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self.etag = None
+            return self.send_error(503)
+
+        if self.path.startswith(LISTING_PATH):
+            return self.send_listing()
+        if self.path.startswith(DETAIL_PATH):
+            return self.send_detail()
+        if self.path.startswith(ASSETS_PATH):
+            return self.send_asset()
+
+        # validators for conditional requests, changed whenever the fixture file changes
+        self.etag = None
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            self.etag = '"{:x}-{:x}"'.format(int(stat.st_mtime), stat.st_size)
+            if self.headers.get('If-None-Match') == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+
+        SimpleHTTPRequestHandler.do_GET(self)
+
+    def send_listing(self):
+        # synthetic SearchResult/Index page, PageIndex selects the page
+        query = parse_qs(urlsplit(self.path).query)
+        category_no = query.get('CategoryNo', ['0'])[0] or '0'
+        page_id = int(query.get('PageIndex', ['1'])[0])
+
+        pages = []
+        for number in range(1, self.server.pages + 1):
+            if number == page_id:
+                pages.append('<span class="page_cur">{}</span>'.format(number))
+            else:
+                pages.append('<a href="javascript:;" _pageindex="{0}">{0}</a>'.format(number))
+        items = [
+            LISTING_ITEM.format(category_no=category_no, page_id=page_id, item=item)
+            for item in range(self.server.links_per_page)
+        ]
+        body = LISTING_TEMPLATE.format(category_no=category_no, items='\n'.join(items), pages=''.join(pages))
+        self.send_html(body)
+
+    def send_detail(self):
+        # synthetic exhibitor page, fields derived from corpid, padded to detail_size bytes
+        query = parse_qs(urlsplit(self.path).query)
+        corpid = query.get('corpid', ['0'])[0]
+        number = sum(ord(char) for char in corpid)
+        body = DETAIL_TEMPLATE.format(corpid=corpid, number=number, capital=number * 1000, padding='')
+        padding = max(0, self.server.detail_size - len(body))
+        self.send_html(DETAIL_TEMPLATE.format(corpid=corpid, number=number, capital=number * 1000, padding='x' * padding))
+
+    def send_html(self, body):
+        body = body.encode('utf-8')
+        self.etag = None
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_asset(self):
+        name = urlsplit(self.path).path
+        content_type = ASSET_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        if content_type in ('text/css', 'application/javascript'):
+            body = b'/* filler */\n' * (self.server.asset_size // 13)
+        else:
+            body = b'\0' * self.server.asset_size
+
+        self.etag = None
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        # every page load pays for its assets, like the first visit of a fresh browser
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def end_headers(self):
+        if getattr(self, 'etag', None):
+            self.send_header('ETag', self.etag)
+        SimpleHTTPRequestHandler.end_headers(self)
+
+    def translate_path(self, path):
+        path = path.split('?', 1)[0].split('#', 1)[0]
+        return os.path.join(FIXTURES_PATH, os.path.basename(path))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockSiteServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, latency=0, pages=5, links_per_page=20, asset_size=50000,
+                 detail_size=30000, failure_rate=0, capacity=0, stall=5):
+        HTTPServer.__init__(self, server_address, MockSiteHandler)
+        # seconds added to every response
+        self.latency = latency
+        # size of every synthetic category listing
+        self.pages = pages
+        self.links_per_page = links_per_page
+        # bytes of every /assets/ response
+        self.asset_size = asset_size
+        # bytes of every generated detail page, real ones are around 30 KB
+        self.detail_size = detail_size
+        # share of requests answered with 503
+        self.failure_rate = failure_rate
+        # requests served at once, 0 is unlimited; the ones over it stall, then get a 503
+        self.capacity = capacity
+        self.stall = stall
+        self.in_flight = 0
+        self.throttled = 0
+        self.in_flight_lock = threading.Lock()
+
+    def enter(self):
+        with self.in_flight_lock:
+            self.in_flight += 1
+            if self.in_flight > self.capacity:
+                self.throttled += 1
+            return self.in_flight
+
+    def leave(self):
+        with self.in_flight_lock:
+            self.in_flight -= 1
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    server = MockSiteServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return 'http://{host}:{port}'.format(host=host, port=port)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--pages', type=int, default=5, help='pages per category listing')
+    parser.add_argument('--links-per-page', type=int, default=20)
+    parser.add_argument('--asset-size', type=int, default=50000, help='bytes of every /assets/ response')
+    parser.add_argument('--detail-size', type=int, default=30000, help='bytes of every generated detail page')
+    parser.add_argument('--failure-rate', type=float, default=0, help='share of requests answered with 503')
+    parser.add_argument('--capacity', type=int, default=0, help='requests served at once, 0 is unlimited')
+    parser.add_argument('--stall', type=float, default=5, help='seconds a request over capacity hangs before its 503')
+    args = parser.parse_args()
+
+    server = MockSiteServer(
+        (args.host, args.port),
+        latency=args.latency,
+        pages=args.pages,
+        links_per_page=args.links_per_page,
+        asset_size=args.asset_size,
+        detail_size=args.detail_size,
+        failure_rate=args.failure_rate,
+        capacity=args.capacity,
+        stall=args.stall,
+    )
+    print('Serving {} on {}'.format(FIXTURES_PATH, server_url(server)))
+    server.serve_forever()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+# End to end run against the mock site and a scratch schema of the local
+# PostgreSQL: listing pages -> exhibitor links, detail pages -> exhibitor rows,
+# rows -> CSV. Each stage runs in its own process so peak RSS is per stage.
+# Prints pages/sec, rows/sec and peak RSS, --report writes the same as json
+# for comparing runs.
+#
+#   python benchmarks/run_benchmark.py --categories 20 --pages 10 --links-per-page 20 \
+#       --latency 0.02 --failure-rate 0.01 --report report.json
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, BASE_PATH)
+
+SCHEMA = 'bench_e2e'
+STAGES = ('links', 'data', 'export')
+
+# set before db is imported, every connection of the children lands in the scratch schema
+if '--child' in sys.argv:
+    os.environ['DB_SCHEMA'] = SCHEMA
+
+import db
+from metrics import METRICS
+from mock_site import LISTING_PATH, server_url, start_server
+
+
+def category_urls(base_url, categories):
+    return ['{}{}?CategoryNo={}'.format(base_url, LISTING_PATH, category_no) for category_no in range(1, categories + 1)]
+
+
+def run_links(args):
+    from pagination import ListingCrawler, PaginationEngine
+
+    crawler = ListingCrawler(concurrency=args.concurrency, retries=args.retries, backoff=args.backoff)
+    PaginationEngine(crawler).run(category_urls(args.base_url, args.categories))
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM "category_page";')
+            pages = cursor.fetchone()[0]
+            cursor.execute('SELECT count(*) FROM "exhibitor";')
+            rows = cursor.fetchone()[0]
+    return pages, rows
+
+
+def run_data(args):
+    from async_crawler import AsyncCrawler, crawl_pending
+
+    crawl_pending(AsyncCrawler(concurrency=args.concurrency, retries=args.retries, backoff=args.backoff))
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM "exhibitor" WHERE is_done = true;')
+            rows = cursor.fetchone()[0]
+    return rows, rows
+
+
+def run_export(args):
+    import export_csv
+
+    with db.connect() as connection:
+        with open(args.output, 'w', encoding='utf-8') as write_file:
+            export_csv.write_csv(connection, write_file, args.export_mode)
+    with open(args.output, encoding='utf-8') as read_file:
+        rows = sum(1 for _ in read_file) - 1
+    return 0, rows
+
+
+def run_child(args):
+    stages = {'links': run_links, 'data': run_data, 'export': run_export}
+    started = time.time()
+    pages, rows = stages[args.child](args)
+    elapsed = time.time() - started
+    # ru_maxrss is in kilobytes on linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    counters = {
+        '{}{}'.format(counter['name'], json.dumps(counter['labels'], sort_keys=True)): counter['value']
+        for counter in METRICS.as_dict()['counters']
+    }
+    print(json.dumps({
+        'stage': args.child,
+        'seconds': elapsed,
+        'pages': pages,
+        'rows': rows,
+        'pages_per_sec': pages / elapsed if elapsed else None,
+        'rows_per_sec': rows / elapsed if elapsed else None,
+        'peak_rss': peak_rss,
+        'counters': counters,
+    }))
+
+
+def create_schema():
+    import migrate
+
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};'.format(schema=SCHEMA))
+        connection.commit()
+    with db.connect(options='-c search_path={}'.format(SCHEMA)) as connection:
+        migrate.migrate(connection)
+
+
+def drop_schema():
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA {schema} CASCADE;'.format(schema=SCHEMA))
+        connection.commit()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BASE_PATH).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--pages', type=int, default=10, help='pages per category listing')
+    parser.add_argument('--links-per-page', type=int, default=20)
+    parser.add_argument('--detail-size', type=int, default=30000, help='bytes of every detail page')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every response')
+    parser.add_argument('--failure-rate', type=float, default=0, help='share of requests answered with 503')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--retries', type=int, default=5)
+    parser.add_argument('--backoff', type=float, default=0.05)
+    parser.add_argument('--export-mode', default='copy')
+    parser.add_argument('--output', default=os.path.join(tempfile.gettempdir(), 'run_benchmark.csv'))
+    parser.add_argument('--report', help='write the results as json to this file')
+    parser.add_argument('--keep', action='store_true', help='keep the {} schema for inspection'.format(SCHEMA))
+    parser.add_argument('--child', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        sys.exit(0)
+
+    server = start_server(
+        latency=args.latency,
+        pages=args.pages,
+        links_per_page=args.links_per_page,
+        detail_size=args.detail_size,
+        failure_rate=args.failure_rate,
+    )
+    options = [
+        '--concurrency', str(args.concurrency),
+        '--retries', str(args.retries),
+        '--backoff', str(args.backoff),
+        '--categories', str(args.categories),
+        '--export-mode', args.export_mode,
+        '--output', args.output,
+        '--base-url', server_url(server),
+    ]
+
+    create_schema()
+    results = []
+    try:
+        print('{} categories x {} pages x {} links, {}s latency, {:.1%} failures'.format(
+            args.categories, args.pages, args.links_per_page, args.latency, args.failure_rate,
+        ))
+        print('{:<8} {:>10} {:>8} {:>10} {:>12} {:>12} {:>14}'.format(
+            'stage', 'seconds', 'pages', 'pages/sec', 'rows', 'rows/sec', 'peak RSS MiB',
+        ))
+        for stage in STAGES:
+            output = subprocess.check_output([sys.executable, __file__, '--child', stage] + options)
+            result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+            results.append(result)
+            print('{:<8} {:>10.2f} {:>8} {:>10.1f} {:>12} {:>12.0f} {:>14.1f}'.format(
+                stage, result['seconds'], result['pages'], result['pages_per_sec'],
+                result['rows'], result['rows_per_sec'], result['peak_rss'] / 2 ** 20,
+            ))
+    finally:
+        server.shutdown()
+        if not args.keep:
+            drop_schema()
+        if os.path.exists(args.output):
+            os.remove(args.output)
+
+    expected_links = args.categories * args.pages * args.links_per_page
+    report = {
+        'commit': git_commit(),
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parameters': {
+            'categories': args.categories,
+            'pages': args.pages,
+            'links_per_page': args.links_per_page,
+            'detail_size': args.detail_size,
+            'latency': args.latency,
+            'failure_rate': args.failure_rate,
+            'concurrency': args.concurrency,
+            'retries': args.retries,
+            'export_mode': args.export_mode,
+        },
+        'expected_links': expected_links,
+        'stages': results,
+    }
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
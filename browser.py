@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from exhibitor_parser import EXHIBITOR_FIELDS
+from metrics import METRICS
+from routing import split_proxy
+
+logger = logging.getLogger(__name__)
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+CHROMEDRIVER_PATH = os.path.join(BASE_PATH, 'chromedriver')
+
+# first party hosts, every other host resolves to nothing in the tuned profile
+ALLOWED_HOSTS = [host for host in os.getenv('SELENIUM_ALLOWED_HOSTS', 'cantonfair.org.cn,localhost').split(',') if host]
+
+# fetched by the page but never needed for the fields, blocked over CDP: chrome
+# has content settings for images only
+BLOCKED_URLS = [
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp',
+]
+
+# WebDriverWait timeout is the observed p99 of the same wait times WAIT_FACTOR,
+# between WAIT_MIN and WAIT_MAX seconds; WAIT_MAX until WAIT_MIN_SAMPLES waits were seen
+WAIT_MIN = float(os.getenv('SELENIUM_WAIT_MIN', 10))
+WAIT_MAX = float(os.getenv('SELENIUM_WAIT_MAX', 5*60))
+WAIT_FACTOR = 3
+WAIT_MIN_SAMPLES = 20
+
+# all Exhi_* texts in one round trip, innerText is what WebElement.text returns
+READ_FIELDS_SCRIPT = """
+    var ids = arguments[0], texts = {};
+    for (var i = 0; i < ids.length; i++) {
+        var element = document.getElementById(ids[i]);
+        texts[ids[i]] = element ? element.innerText.trim() : '';
+    }
+    return texts;
+"""
+
+
+def chrome_options(headless=True, tuned=True, proxy=None):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless')
+        options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1024,800')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    proxy_host = None
+    if proxy:
+        parts = split_proxy(proxy)
+        if parts.username:
+            # chrome ignores them and every page would get a 407
+            raise ValueError('Chrome takes no credentials in --proxy-server: {}'.format(parts.hostname))
+        proxy_host = parts.hostname
+        options.add_argument('--proxy-server={}'.format(proxy))
+    if tuned:
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+        })
+        if ALLOWED_HOSTS:
+            rules = ['MAP * ~NOTFOUND']
+            for host in ALLOWED_HOSTS:
+                rules.extend(['EXCLUDE {}'.format(host), 'EXCLUDE *.{}'.format(host)])
+            if proxy_host:
+                # the browser resolves the proxy itself
+                rules.append('EXCLUDE {}'.format(proxy_host))
+            options.add_argument('--host-resolver-rules={}'.format(', '.join(rules)))
+    return options
+
+
+def execute_cdp_cmd(driver, cmd, params):
+    # webdriver.Chrome.execute_cdp_cmd for any driver, webdriver.Remote has no
+    # such method but the hub passes the chromedriver command on to the node
+    driver.command_executor._commands['executeCdpCommand'] = ('POST', '/session/$sessionId/goog/cdp/execute')
+    return driver.execute('executeCdpCommand', {'cmd': cmd, 'params': params})['value']
+
+
+def block_urls(driver, patterns=BLOCKED_URLS):
+    # stylesheets, fonts and images are only blocked with a chromedriver that speaks CDP
+    try:
+        execute_cdp_cmd(driver, 'Network.enable', {})
+        execute_cdp_cmd(driver, 'Network.setBlockedURLs', {'urls': patterns})
+    except WebDriverException as e:
+        logger.warning('Stylesheets and fonts are not blocked, chromedriver has no CDP: {}'.format(e))
+        return False
+    return True
+
+
+def make_driver(grid_url=None, headless=True, tuned=True, proxy=None):
+    # grid_url points at a Selenium Grid hub, e.g. http://hub:4444/wd/hub
+    # tuned: no images / css / fonts / third party hosts, driver.get returns at DOMContentLoaded
+    # proxy: host:port or scheme://host:port, chrome takes no credentials in it
+    options = chrome_options(headless, tuned, proxy)
+    capabilities = options.to_capabilities()
+    if tuned:
+        capabilities['pageLoadStrategy'] = 'eager'
+    if grid_url:
+        driver = webdriver.Remote(command_executor=grid_url, desired_capabilities=capabilities)
+    else:
+        driver = webdriver.Chrome(CHROMEDRIVER_PATH, desired_capabilities=capabilities)
+    if tuned:
+        block_urls(driver)
+    return driver
+
+
+def wait_timeout(page):
+    p99 = METRICS.quantile(
+        'scrape_stage_seconds', 0.99, min_count=WAIT_MIN_SAMPLES,
+        stage='wait_for_selector', fetcher='selenium', page=page,
+    )
+    if p99 is None:
+        return WAIT_MAX
+    return min(WAIT_MAX, max(WAIT_MIN, p99 * WAIT_FACTOR))
+
+
+def read_exhibitor_fields(driver):
+    texts = driver.execute_script(READ_FIELDS_SCRIPT, [element_id for _, element_id in EXHIBITOR_FIELDS]) or {}
+    return {key: texts.get(element_id) or '' for key, element_id in EXHIBITOR_FIELDS}
+
+
+class DriverSession(object):
+    # one browser reused across pages, restarted after max_pages or on crash;
+    # with a scheduler every restart takes the next route, a quarantined route restarts it
+
+    def __init__(self, grid_url=None, max_pages=200, scheduler=None):
+        self.grid_url = grid_url
+        self.max_pages = max_pages
+        self.scheduler = scheduler
+        self.driver = None
+        self.route = None
+        self.pages = 0
+
+    def next_driver(self):
+        if self.driver is None or self.pages >= self.max_pages:
+            self.recycle()
+        elif self.route is not None and not self.route.is_available(time.time()):
+            self.recycle()
+        self.pages += 1
+        return self.driver
+
+    def recycle(self):
+        self.quit()
+        if self.scheduler is not None:
+            self.route = self.scheduler.next_route()
+        self.driver = make_driver(self.grid_url, proxy=self.route.proxy if self.route else None)
+        self.pages = 0
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException:
+                pass
+            self.driver = None
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+import os
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+DOTENV_PATH = os.path.join(BASE_PATH, '.env')
+load_dotenv(DOTENV_PATH)
+
+import psycopg2
+
+from exhibitor_parser import numeric_fields
+
+DB_PARAMS = {
+    'dbname': os.getenv('DB_NAME', 'cantonfair'),
+    'user': os.getenv('DB_USER', 'cantonfair'),
+    'password': os.getenv('DB_PASSWORD', 'cantonfair'),
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+}
+
+# DB_SCHEMA keeps every table of the run in that schema, e.g. a benchmark next to the real data
+if os.getenv('DB_SCHEMA'):
+    DB_PARAMS['options'] = '-c search_path={}'.format(os.getenv('DB_SCHEMA'))
+
+
+def connect(**params):
+    return psycopg2.connect(**dict(DB_PARAMS, **params))
+
+
+@contextmanager
+def savepoint(cursor, name='row'):
+    # a failing statement only undoes itself, the rest of the transaction can still commit
+    cursor.execute('SAVEPOINT "{}";'.format(name))
+    try:
+        yield
+    except psycopg2.Error:
+        cursor.execute('ROLLBACK TO SAVEPOINT "{}";'.format(name))
+        raise
+    cursor.execute('RELEASE SAVEPOINT "{}";'.format(name))
+
+
+def select_pending_urls(cursor):
+    sql_string = """
+        SELECT
+            "url"
+        FROM "exhibitor"
+        WHERE is_done = false;
+    """
+    cursor.execute(sql_string)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def update_exhibitor(cursor, url, data):
+    numbers = numeric_fields(data)
+    sql_string = """
+        UPDATE "exhibitor" SET
+               "address" = %s,
+         "business_type" = %s,
+         "city_province" = %s,
+          "company_name" = %s,
+    "exhibition_records" = %s,
+"international_commercial_terms" = %s,
+               "is_done" = %s,
+         "main_products" = %s,
+       "number_of_staff" = %s,
+             "post_code" = %s,
+    "registered_capital" = %s,
+"registered_capital_yuan" = %s,
+             "staff_min" = %s,
+             "staff_max" = %s,
+       "target_customer" = %s,
+               "website" = %s,
+            "changed_at" = now()
+        WHERE url=%s;
+    """
+    parameters = (
+        data['address'],
+        data['business_type'],
+        data['city_province'],
+        data['company_name'],
+        data['exhibition_records'],
+        data['international_commercial_terms'],
+        True,
+        data['main_products'],
+        data['number_of_staff'],
+        data['post_code'],
+        data['registered_capital'],
+        numbers['registered_capital_yuan'],
+        numbers['staff_min'],
+        numbers['staff_max'],
+        data['target_customer'],
+        data['website'],
+        url,
+    )
+    cursor.execute(sql_string, parameters)
+
+
+def upsert_exhibitor_link(cursor, link, category_id):
+    sql_string = """
+        INSERT INTO "exhibitor" ("url", "category_id")
+        VALUES (%s, %s)
+        ON CONFLICT ("url")
+        DO
+            UPDATE
+                SET category_id = EXCLUDED.category_id;
+    """
+    parameters = (link, category_id)
+    cursor.execute(sql_string, parameters)
+
+
+# Row-level claiming: the selected rows stay locked until the transaction ends,
+# other processes skip them instead of waiting, a crashed worker releases them.
+
+def claim_pending_urls(cursor, limit=1, exclude=()):
+    sql_string = """
+        SELECT
+            "url"
+        FROM "exhibitor"
+        WHERE is_done = false
+          AND NOT ("url" = ANY(%s))
+        ORDER BY "id"
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED;
+    """
+    cursor.execute(sql_string, (list(exclude), limit))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def seed_categories(cursor, category_urls):
+    sql_string = """
+        INSERT INTO "category" ("url")
+        VALUES (%s)
+        ON CONFLICT ("url") DO NOTHING;
+    """
+    cursor.executemany(sql_string, [(url,) for url in category_urls])
+
+
+def select_category_ids(cursor, category_urls):
+    sql_string = """
+        SELECT
+            "url",
+            "id"
+        FROM "category"
+        WHERE "url" = ANY(%s);
+    """
+    cursor.execute(sql_string, (list(category_urls),))
+    return dict(cursor.fetchall())
+
+
+def claim_category(cursor, exclude=()):
+    sql_string = """
+        SELECT
+            "id",
+            "url"
+        FROM "category"
+        WHERE is_done = false
+          AND NOT ("url" = ANY(%s))
+        ORDER BY "id"
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED;
+    """
+    cursor.execute(sql_string, (list(exclude),))
+    return cursor.fetchone()
+
+
+def finish_category(cursor, category_id, name):
+    sql_string = """
+        UPDATE "category" SET
+            "name" = %s,
+            "is_done" = true
+        WHERE id = %s;
+    """
+    cursor.execute(sql_string, (name, category_id))
+
+
+def select_categories(cursor):
+    sql_string = """
+        SELECT
+            "id",
+            "url",
+            "max_page",
+            "name"
+        FROM "category"
+        WHERE is_done = false
+        ORDER BY "id";
+    """
+    cursor.execute(sql_string)
+    return cursor.fetchall()
+
+
+def set_category_pages(cursor, category_id, max_page, name):
+    sql_string = """
+        UPDATE "category" SET
+            "max_page" = %s,
+            "name" = %s
+        WHERE id = %s;
+    """
+    cursor.execute(sql_string, (max_page, name, category_id))
+
+
+def select_done_pages(cursor, category_id):
+    sql_string = """
+        SELECT
+            "page_id"
+        FROM "category_page"
+        WHERE category_id = %s;
+    """
+    cursor.execute(sql_string, (category_id,))
+    return set(row[0] for row in cursor.fetchall())
+
+
+def finish_complete_categories(cursor):
+    # a category is done once every one of its pages is checkpointed
+    sql_string = """
+        UPDATE "category" SET
+            "is_done" = true
+        WHERE is_done = false
+          AND max_page IS NOT NULL
+          AND max_page <= (
+              SELECT count(*) FROM "category_page" WHERE category_page.category_id = category.id
+          );
+    """
+    cursor.execute(sql_string)
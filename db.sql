@@ -1,6 +1,8 @@
 --
 -- PostgreSQL database dump
 --
+-- Schema after every file in migrations/, existing databases are upgraded with python migrate.py
+--
 
 -- Dumped from database version 9.6.8
 -- Dumped by pg_dump version 10.0
@@ -26,26 +28,103 @@ SET default_with_oids = false;
 
 CREATE TABLE exhibitor (
     id integer NOT NULL,
-    url character varying(2044) NOT NULL,
-    is_done boolean DEFAULT false,
-    company_name character varying(2044),
-    address character varying(2044),
-    city_province character varying(2044),
-    post_code character varying(2044),
-    website character varying(2044),
-    main_products character varying(2044),
-    international_commercial_terms character varying(2044),
-    exhibition_records character varying(2044),
-    number_of_staff character varying(2044),
-    registered_capital character varying(2044),
-    business_type character varying(2044),
-    target_customer character varying(2044),
-    category_name character varying(2044)
+    url text NOT NULL,
+    is_done boolean DEFAULT false NOT NULL,
+    company_name text,
+    address text,
+    city_province text,
+    post_code text,
+    website text,
+    main_products text,
+    international_commercial_terms text,
+    exhibition_records text,
+    number_of_staff text,
+    registered_capital text,
+    business_type text,
+    target_customer text,
+    fetched_at timestamp with time zone,
+    fetch_failed_at timestamp with time zone,
+    fetch_failures integer DEFAULT 0 NOT NULL,
+    changed_at timestamp with time zone,
+    etag text,
+    last_modified text,
+    content_hash character(40),
+    registered_capital_yuan numeric,
+    staff_min integer,
+    staff_max integer,
+    category_id integer
 );
 
 
 ALTER TABLE exhibitor OWNER TO cantonfair;
 
+--
+-- Name: export_state; Type: TABLE; Schema: public; Owner: cantonfair
+--
+
+CREATE TABLE export_state (
+    name text PRIMARY KEY,
+    exported_until timestamp with time zone NOT NULL,
+    exported_at timestamp with time zone DEFAULT now()
+);
+
+
+ALTER TABLE export_state OWNER TO cantonfair;
+
+--
+-- Name: schema_migration; Type: TABLE; Schema: public; Owner: cantonfair
+--
+
+CREATE TABLE schema_migration (
+    version text PRIMARY KEY,
+    applied_at timestamp with time zone DEFAULT now()
+);
+
+
+ALTER TABLE schema_migration OWNER TO cantonfair;
+
+INSERT INTO schema_migration (version) VALUES
+    ('0001_baseline'),
+    ('0002_drop_url_sequence'),
+    ('0003_text_columns'),
+    ('0004_pending_index'),
+    ('0005_numeric_columns'),
+    ('0006_exhibitor_category'),
+    ('0007_export_state'),
+    ('0008_fetch_failures'),
+    ('0009_empty_fields'),
+    ('0010_merge_category');
+
+--
+-- Name: category; Type: TABLE; Schema: public; Owner: cantonfair
+--
+
+CREATE TABLE category (
+    id serial PRIMARY KEY,
+    url text UNIQUE,
+    name text,
+    max_page integer,
+    is_done boolean DEFAULT false
+);
+
+
+ALTER TABLE category OWNER TO cantonfair;
+
+--
+-- Name: category_page; Type: TABLE; Schema: public; Owner: cantonfair
+--
+
+CREATE TABLE category_page (
+    category_id integer NOT NULL REFERENCES category (id) ON DELETE CASCADE,
+    page_id integer NOT NULL,
+    links integer NOT NULL,
+    done_at timestamp with time zone DEFAULT now(),
+    PRIMARY KEY (category_id, page_id)
+);
+
+
+ALTER TABLE category_page OWNER TO cantonfair;
+
 --
 -- Name: exhibitors_id_seq; Type: SEQUENCE; Schema: public; Owner: cantonfair
 --
@@ -68,54 +147,62 @@ ALTER SEQUENCE exhibitors_id_seq OWNED BY exhibitor.id;
 
 
 --
--- Name: exhibitors_url_seq; Type: SEQUENCE; Schema: public; Owner: cantonfair
+-- Name: exhibitor id; Type: DEFAULT; Schema: public; Owner: cantonfair
 --
 
-CREATE SEQUENCE exhibitors_url_seq
-    START WITH 1
-    INCREMENT BY 1
-    NO MINVALUE
-    NO MAXVALUE
-    CACHE 1;
+ALTER TABLE ONLY exhibitor ALTER COLUMN id SET DEFAULT nextval('exhibitors_id_seq'::regclass);
 
 
-ALTER TABLE exhibitors_url_seq OWNER TO cantonfair;
+--
+-- Name: exhibitor exhibitor_url_key; Type: CONSTRAINT; Schema: public; Owner: cantonfair
+--
+
+ALTER TABLE ONLY exhibitor
+    ADD CONSTRAINT exhibitor_url_key UNIQUE (url);
+
 
 --
--- Name: exhibitors_url_seq; Type: SEQUENCE OWNED BY; Schema: public; Owner: cantonfair
+-- Name: exhibitor exhibitors_pkey; Type: CONSTRAINT; Schema: public; Owner: cantonfair
 --
 
-ALTER SEQUENCE exhibitors_url_seq OWNED BY exhibitor.url;
+ALTER TABLE ONLY exhibitor
+    ADD CONSTRAINT exhibitors_pkey PRIMARY KEY (id);
 
 
 --
--- Name: exhibitor id; Type: DEFAULT; Schema: public; Owner: cantonfair
+-- Name: exhibitor_fetched_at_idx; Type: INDEX; Schema: public; Owner: cantonfair
 --
 
-ALTER TABLE ONLY exhibitor ALTER COLUMN id SET DEFAULT nextval('exhibitors_id_seq'::regclass);
+CREATE INDEX exhibitor_fetched_at_idx ON exhibitor USING btree (fetched_at NULLS FIRST);
 
 
 --
--- Name: exhibitor url; Type: DEFAULT; Schema: public; Owner: cantonfair
+-- Name: exhibitor_pending_idx; Type: INDEX; Schema: public; Owner: cantonfair
 --
 
-ALTER TABLE ONLY exhibitor ALTER COLUMN url SET DEFAULT nextval('exhibitors_url_seq'::regclass);
+CREATE INDEX exhibitor_pending_idx ON exhibitor USING btree (id) WHERE is_done = false;
 
 
 --
--- Name: exhibitor exhibitor_url_key; Type: CONSTRAINT; Schema: public; Owner: cantonfair
+-- Name: exhibitor_category_id_idx; Type: INDEX; Schema: public; Owner: cantonfair
 --
 
-ALTER TABLE ONLY exhibitor
-    ADD CONSTRAINT exhibitor_url_key UNIQUE (url);
+CREATE INDEX exhibitor_category_id_idx ON exhibitor USING btree (category_id);
 
 
 --
--- Name: exhibitor exhibitors_pkey; Type: CONSTRAINT; Schema: public; Owner: cantonfair
+-- Name: exhibitor_changed_at_idx; Type: INDEX; Schema: public; Owner: cantonfair
+--
+
+CREATE INDEX exhibitor_changed_at_idx ON exhibitor USING btree (changed_at);
+
+
+--
+-- Name: exhibitor exhibitor_category_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: cantonfair
 --
 
 ALTER TABLE ONLY exhibitor
-    ADD CONSTRAINT exhibitors_pkey PRIMARY KEY (id);
+    ADD CONSTRAINT exhibitor_category_id_fkey FOREIGN KEY (category_id) REFERENCES category(id);
 
 
 --
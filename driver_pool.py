@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import logging
+import os
+import threading
+
+import psycopg2
+
+import db
+from browser import DriverSession
+from categories import CATEGORY_LIST
+from get_exhibitors import CantonfairScraper
+from metrics import log_summary, start_from_env
+from page_cache import default_cache
+from routing import scheduler_from_env
+from write_buffer import upsert_links
+
+logger = logging.getLogger(__name__)
+
+
+class DriverWorker(CantonfairScraper, threading.Thread):
+    # one browser session and one db connection, jobs are claimed row by row
+
+    def __init__(self, pool, name):
+        threading.Thread.__init__(self, name=name)
+        self.daemon = True
+        self.pool = pool
+        self.logger = logger
+        self.session = DriverSession(pool.grid_url, pool.max_pages, pool.scheduler)
+        self.scheduler = pool.scheduler
+        self.page_cache = pool.page_cache
+        self.driver = None
+
+    def run(self):
+        try:
+            with db.connect() as connection:
+                if 'categories' in self.pool.stages:
+                    while self.scrape_next_category(connection):
+                        pass
+                if 'exhibitors' in self.pool.stages:
+                    while self.scrape_next_exhibitors(connection):
+                        pass
+        except Exception as e:
+            logger.exception(str(e))
+        finally:
+            self.session.quit()
+
+    def scrape_next_category(self, connection):
+        with connection.cursor() as cursor:
+            job = db.claim_category(cursor, self.pool.failed_urls())
+            if job is None:
+                connection.commit()
+                return False
+
+            category_id, category_url = job
+            try:
+                self.driver = self.session.next_driver()
+                max_page, category = self.get_category_max_page(category_url)
+                links, complete = self.get_exhibitors_links(category_url, max_page)
+                upsert_links(cursor, [(link, category_id, category) for link in links])
+                # max_page 0: the page count itself could not be read
+                if complete and max_page:
+                    db.finish_category(cursor, category_id, category)
+                else:
+                    # links so far are kept, the category stays open for another node or run
+                    self.pool.mark_failed(category_url)
+                    self.session.recycle()
+            except Exception as e:
+                logger.exception('{} {}'.format(category_url, e))
+                self.pool.mark_failed(category_url)
+                self.session.recycle()
+            connection.commit()
+            return True
+
+    def scrape_next_exhibitors(self, connection):
+        with connection.cursor() as cursor:
+            urls = db.claim_pending_urls(cursor, self.pool.batch_size, self.pool.failed_urls())
+            if not urls:
+                connection.commit()
+                return False
+
+            for url in urls:
+                try:
+                    self.driver = self.session.next_driver()
+                    self.route = self.session.route
+                    data = self.get_exhibitors_data(url)
+                except Exception as e:
+                    logger.exception('{} {}'.format(url, e))
+                    data = None
+                if data is None:
+                    # stalled or the browser failed, left pending for another node or run
+                    self.pool.mark_failed(url)
+                    self.session.recycle()
+                    continue
+                try:
+                    # the rows already written in this batch survive a failing one
+                    with db.savepoint(cursor):
+                        db.update_exhibitor(cursor, url, data)
+                except psycopg2.Error as e:
+                    # not retried by this process, another node may still pick it up; the browser is fine
+                    logger.exception('{} {}'.format(url, e))
+                    self.pool.mark_failed(url)
+            connection.commit()
+            return True
+
+
+class DriverPool(object):
+
+    def __init__(self, size=4, max_pages=200, grid_url=None, batch_size=1, stages=('categories', 'exhibitors'), scheduler=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.grid_url = grid_url
+        self.batch_size = batch_size
+        self.stages = stages
+        # shared by all workers, the exhibitor page limit bounds the browsers loading at once
+        self.scheduler = scheduler
+        self.page_cache = default_cache()
+        self.failed = set()
+        self.failed_lock = threading.Lock()
+
+    def mark_failed(self, url):
+        with self.failed_lock:
+            self.failed.add(url)
+
+    def failed_urls(self):
+        with self.failed_lock:
+            return list(self.failed)
+
+    def run(self):
+        with db.connect() as connection:
+            with connection.cursor() as cursor:
+                db.seed_categories(cursor, CATEGORY_LIST)
+            connection.commit()
+
+        workers = [DriverWorker(self, 'driver-{}'.format(i)) for i in range(self.size)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-pages', type=int, default=200, help='restart a browser after this many pages')
+    parser.add_argument('--grid', default=os.getenv('SELENIUM_GRID_URL'), help='Selenium Grid hub url, local chromedriver if empty')
+    parser.add_argument('--batch-size', type=int, default=1, help='exhibitor rows claimed per transaction')
+    parser.add_argument('--stage', choices=('categories', 'exhibitors', 'all'), default='all')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(threadName)s %(message)s')
+    start_from_env()
+    stages = ('categories', 'exhibitors') if args.stage == 'all' else (args.stage,)
+    DriverPool(
+        size=args.workers,
+        max_pages=args.max_pages,
+        grid_url=args.grid,
+        batch_size=args.batch_size,
+        stages=stages,
+        scheduler=scheduler_from_env(),
+    ).run()
+    log_summary()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# product key -> id of the element on the exhibitor detail page
+EXHIBITOR_FIELDS = (
+    ('address', 'Exhi_Address'),
+    ('business_type', 'Exhi_TypeName'),
+    ('city_province', 'Exhi_Province'),
+    ('company_name', 'Exhi_Name'),
+    ('exhibition_records', 'Exhi_Record'),
+    ('international_commercial_terms', 'Exhi_OEMode'),
+    ('main_products', 'Exhi_KeyWord'),
+    ('number_of_staff', 'Exhi_PeopleNum'),
+    ('post_code', 'Exhi_ZipCode'),
+    ('registered_capital', 'Exhi_ExhFund'),
+    ('target_customer', 'Exhi_BuyerType'),
+    ('website', 'Exhi_WebSite'),
+)
+
+CONTENT_XPATH = '//*[@id="content"]//*[contains(concat(" ", normalize-space(@class), " "), " cright ")]'
+FIELDS_XPATH = '//*[starts-with(@id, "Exhi_")]'
+
+
+# elements innerText puts on lines of their own
+BLOCK_TAGS = frozenset([
+    'address', 'blockquote', 'dd', 'div', 'dl', 'dt', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'li', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul',
+])
+HIDDEN_TAGS = frozenset(['script', 'style', 'noscript'])
+# stands for a line break until the source whitespace is collapsed
+LINE_BREAK = '\x00'
+
+
+def text_parts(element, parts):
+    # comments and processing instructions have no string tag, their text is not shown
+    if not isinstance(element.tag, str) or element.tag in HIDDEN_TAGS:
+        return
+    if element.tag == 'br':
+        parts.append(LINE_BREAK)
+    block = element.tag in BLOCK_TAGS
+    if block:
+        parts.append(LINE_BREAK)
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        text_parts(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+    if block:
+        parts.append(LINE_BREAK)
+
+
+def element_text(element):
+    # same shape as WebElement.text / innerText: <br> and block boundaries are
+    # line breaks, other whitespace collapsed, lines trimmed
+    parts = []
+    text_parts(element, parts)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split(LINE_BREAK))
+    return '\n'.join(line for line in lines if line)
+
+
+def parse_document(page_source):
+    # None for a blank or comment-only body, what a throttled site sends with a 200
+    try:
+        return lxml_html.fromstring(page_source)
+    except etree.ParserError:
+        return None
+
+
+def parse_exhibitor_html(page_source):
+    """Return the product dict for a detail page or None if it has no content block."""
+    if not page_source:
+        return None
+
+    tree = parse_document(page_source)
+    if tree is None or not tree.xpath(CONTENT_XPATH):
+        return None
+
+    # one pass over the document instead of one lookup per field
+    texts = {}
+    for element in tree.xpath(FIELDS_XPATH):
+        texts.setdefault(element.get('id'), element_text(element))
+
+    return {key: texts.get(element_id, '') for key, element_id in EXHIBITOR_FIELDS}
+
+
+LINKS_XPATH = '//*[@id="gjh_pro_result"]//*[contains(concat(" ", normalize-space(@class), " "), " czs-list ")]/*[contains(concat(" ", normalize-space(@class), " "), " min ")]/dl/dt/a[@target="_blank"]/@href'
+PAGES_XPATH = '//*[contains(concat(" ", normalize-space(@class), " "), " pagenumber ")]/*'
+CATEGORY_XPATH = '//*[@id="curmb"]/a'
+CURRENT_PAGE_XPATH = '//*[contains(concat(" ", normalize-space(@class), " "), " page_cur ")]'
+
+
+def parse_listing_html(page_source, page_url):
+    """Return (links, max_page, category, current_page) for a SearchResult/Index page or None without #pagearea."""
+    if not page_source:
+        return None
+
+    tree = parse_document(page_source)
+    if tree is None or not tree.xpath('//*[@id="pagearea"]'):
+        return None
+
+    links = [urljoin(page_url, href) for href in tree.xpath(LINKS_XPATH)]
+
+    page_ids = [1]
+    for page in tree.xpath(PAGES_XPATH):
+        for value in (page.get('_pageindex'), page.text_content().strip()):
+            if value and value.isdigit():
+                page_ids.append(int(value))
+
+    category = tree.xpath(CATEGORY_XPATH)
+    category = element_text(category[0]) if category else 'International Pavilion'
+
+    # the page the site says it served, 1 without a pager
+    current_page = 1
+    for page in tree.xpath(CURRENT_PAGE_XPATH):
+        value = page.text_content().strip()
+        if value.isdigit():
+            current_page = int(value)
+            break
+
+    return links, max(page_ids), category, current_page
+
+
+# numeric columns stored next to the text fields, see migrations/0005_numeric_columns.sql
+NUMERIC_COLUMNS = (
+    ('registered_capital_yuan', 'numeric'),
+    ('staff_min', 'integer'),
+    ('staff_max', 'integer'),
+)
+
+
+def parse_registered_capital(text):
+    # '5,000,000 YUAN' -> 5000000, None without digits
+    digits = re.sub('[^0-9]', '', text or '')
+    return int(digits) if digits else None
+
+
+def parse_number_of_staff(text):
+    # '201-500People' -> (201, 500), 'Below 50People' -> (None, 50), 'Above 1000People' -> (1000, None)
+    text = (text or '').replace(',', '')
+    numbers = re.findall('[0-9]+', text)
+    if not numbers:
+        return None, None
+    low, high = int(numbers[0]), int(numbers[-1])
+    if re.search('below|less|under', text, re.IGNORECASE):
+        low = None
+    elif re.search('above|more|over', text, re.IGNORECASE):
+        high = None
+    return low, high
+
+
+def numeric_fields(product):
+    staff_min, staff_max = parse_number_of_staff(product.get('number_of_staff'))
+    return {
+        'registered_capital_yuan': parse_registered_capital(product.get('registered_capital')),
+        'staff_min': staff_min,
+        'staff_max': staff_max,
+    }
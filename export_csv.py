@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import csv
+import re
+import sys
+import time
+
+import db
+from metrics import METRICS, log_summary, start_from_env
+
+HEADER = [
+    "company_name",
+    "city_province",
+    "website",
+    "main_products",
+    "address",
+    "post_code",
+    "business_type",
+    "category_name",
+    "exhibition_records",
+    "international_commercial_terms",
+    "number_of_staff",
+    "registered_capital (YUAN)",
+    "target_customer",
+    "url"
+]
+
+# same cleaning as the python path, done by postgres while it streams the rows,
+# registered capital was already parsed to a number at ingest
+EXPORT_SQL = """
+    SELECT
+        replace(btrim(coalesce("company_name", ''), ','), '''', ''),
+        replace(btrim(coalesce("city_province", ''), ','), '''', ''),
+        replace(btrim(coalesce("website", ''), ','), '''', ''),
+        replace(btrim(coalesce("main_products", ''), ','), '''', ''),
+        replace(btrim(coalesce("address", ''), ','), '''', ''),
+        replace(btrim(coalesce("post_code", ''), ','), '''', ''),
+        replace(btrim(coalesce("business_type", ''), ','), '''', ''),
+        replace(btrim(coalesce("category"."name", ''), ','), '''', ''),
+        replace(btrim(coalesce("exhibition_records", ''), ','), '''', ''),
+        replace(btrim(coalesce("international_commercial_terms", ''), ','), '''', ''),
+        replace(btrim(coalesce("number_of_staff", ''), ','), 'People', ''),
+        coalesce("registered_capital_yuan"::text, ''),
+        replace(btrim(coalesce("target_customer", ''), ','), '''', ''),
+        replace(btrim(coalesce("url", ''), ','), '''', '')
+    FROM "exhibitor"
+    LEFT JOIN "category" ON "category"."id" = "exhibitor"."category_id"
+    WHERE is_done = TRUE
+"""
+
+EXPORT_MODES = ('copy', 'cursor', 'python')
+
+
+def csv_writer(write_file):
+    return csv.writer(write_file, delimiter=',', quotechar="'", quoting=csv.QUOTE_ALL, lineterminator='\n')
+
+
+def write_csv_copy(connection, write_file):
+    # COPY streams straight from the server into the file, python only moves buffers
+    csv_writer(write_file).writerow(HEADER)
+    write_file.flush()
+    sql_string = "COPY ({}) TO STDOUT WITH (FORMAT csv, QUOTE '''', FORCE_QUOTE *)".format(EXPORT_SQL)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql_string, write_file)
+        METRICS.increment('csv_rows_total', max(cursor.rowcount, 0), mode='copy')
+
+
+def write_csv_cursor(connection, write_file, itersize=5000):
+    # named cursor keeps the result set on the server, itersize rows are held at a time
+    writer = csv_writer(write_file)
+    writer.writerow(HEADER)
+    with connection.cursor(name='export_csv') as cursor:
+        cursor.itersize = itersize
+        cursor.execute(EXPORT_SQL)
+        for row in cursor:
+            with METRICS.timer('csv_row', mode='cursor'):
+                writer.writerow(row)
+            METRICS.increment('csv_rows_total', mode='cursor')
+
+
+def write_csv_python(connection, write_file):
+    # original implementation, loads the whole table and cleans rows in python
+    writer = csv_writer(write_file)
+    writer.writerow(HEADER)
+    with connection.cursor() as cursor:
+        sql_string = """
+            SELECT
+                "company_name",
+                "city_province",
+                "website",
+                "main_products",
+                "address",
+                "post_code",
+                "business_type",
+                "category"."name",
+                "exhibition_records",
+                "international_commercial_terms",
+                "number_of_staff",
+                "registered_capital",
+                "target_customer",
+                "url"
+            FROM "exhibitor"
+            LEFT JOIN "category" ON "category"."id" = "exhibitor"."category_id"
+            WHERE is_done = TRUE;
+        """
+        cursor.execute(sql_string)
+
+        for row in cursor.fetchall():
+            row_started = time.time()
+            # missing fields and categories come back as NULL, the sql modes coalesce them too
+            row = ['' if value is None else value for value in row]
+            row[11] = re.sub('[^0-9]', '', row[11])
+            row[10] = row[10].strip(',').replace('People', '')
+            for i in (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 13):
+                row[i] = row[i].strip(',').replace("'", '')
+            writer.writerow(row)
+            METRICS.observe('scrape_stage_seconds', time.time() - row_started, stage='csv_row', mode='python')
+            METRICS.increment('csv_rows_total', mode='python')
+
+
+def write_csv(connection, write_file, mode='copy'):
+    writers = {
+        'copy': write_csv_copy,
+        'cursor': write_csv_cursor,
+        'python': write_csv_python,
+    }
+    if mode not in writers:
+        raise ValueError('Unknown export mode {}'.format(mode))
+    # copy mode never sees single rows, csv_export over csv_rows_total gives the per-row cost
+    with METRICS.timer('csv_export', mode=mode):
+        writers[mode](connection, write_file)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=EXPORT_MODES, default='copy')
+    parser.add_argument('--output', default='output.csv', help='file name, - for stdout')
+    args = parser.parse_args()
+
+    start_from_env()
+    with db.connect() as connection:
+        if args.output == '-':
+            write_csv(connection, sys.stdout, args.mode)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as write_file:
+                write_csv(connection, write_file, args.mode)
+    log_summary()
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import datetime
+import decimal
+import json
+import logging
+import zlib
+
+import db
+from metrics import METRICS, log_summary, start_from_env
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# rows fetched from the server at a time, also the parquet row group size
+CHUNK_SIZE = 50000
+
+# values as stored, no quote stripping, numbers and timestamps keep their types
+EXPORT_COLUMNS = (
+    ('url', 'string'),
+    ('company_name', 'string'),
+    ('city_province', 'string'),
+    ('website', 'string'),
+    ('main_products', 'string'),
+    ('address', 'string'),
+    ('post_code', 'string'),
+    ('business_type', 'string'),
+    ('category_name', 'string'),
+    ('exhibition_records', 'string'),
+    ('international_commercial_terms', 'string'),
+    ('number_of_staff', 'string'),
+    ('staff_min', 'int32'),
+    ('staff_max', 'int32'),
+    ('registered_capital', 'string'),
+    ('registered_capital_yuan', 'decimal'),
+    ('target_customer', 'string'),
+    ('changed_at', 'timestamp'),
+)
+
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+# few distinct values repeated over every row
+DICTIONARY_COLUMNS = ['category_name', 'city_province', 'business_type']
+
+EXPORT_SQL = """
+    SELECT
+        "exhibitor"."url",
+        "company_name",
+        "city_province",
+        "website",
+        "main_products",
+        "address",
+        "post_code",
+        "business_type",
+        "category"."name",
+        "exhibition_records",
+        "international_commercial_terms",
+        "number_of_staff",
+        "staff_min",
+        "staff_max",
+        "registered_capital",
+        "registered_capital_yuan"::numeric(38, 0),
+        "target_customer",
+        "changed_at" AT TIME ZONE 'UTC'
+    FROM "exhibitor"
+    LEFT JOIN "category" ON "category"."id" = "exhibitor"."category_id"
+    WHERE is_done = TRUE
+"""
+
+# only rows written after the newest changed_at of the last export with the same name
+INCREMENTAL_SQL = """
+      AND "changed_at" > %s
+"""
+
+
+def arrow_type(column_type):
+    return {
+        'string': pa.string(),
+        'int32': pa.int32(),
+        'decimal': pa.decimal128(38, 0),
+        # changed_at is selected as utc without a zone
+        'timestamp': pa.timestamp('us', tz='UTC'),
+    }[column_type]
+
+
+class ParquetExporter(object):
+    # one row group per chunk, strings of DICTIONARY_COLUMNS are dictionary encoded
+
+    def __init__(self, path, compression='snappy', row_group_size=CHUNK_SIZE):
+        if pa is None:
+            raise RuntimeError('parquet export needs pyarrow')
+        self.schema = pa.schema([pa.field(name, arrow_type(column_type)) for name, column_type in EXPORT_COLUMNS])
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression, use_dictionary=DICTIONARY_COLUMNS)
+
+    def write_rows(self, rows):
+        columns = zip(*rows)
+        arrays = [pa.array(list(values), type=field.type) for values, field in zip(columns, self.schema)]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema), row_group_size=self.row_group_size)
+
+    def close(self):
+        self.writer.close()
+
+
+def json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat() + 'Z'
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def compressor(compression, level=None):
+    # both produce a complete .gz / .zst file from compress() calls and a final flush()
+    if compression == 'gzip':
+        return zlib.compressobj(level or 6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd compression needs zstandard')
+        return zstandard.ZstdCompressor(level=level or 3).compressobj()
+    if compression in (None, 'none'):
+        return None
+    raise ValueError('Unknown compression {}'.format(compression))
+
+
+class NdjsonExporter(object):
+    # one json object per line, compressed chunk by chunk
+
+    def __init__(self, path, compression='gzip', level=None):
+        self.compressor = compressor(compression, level)
+        self.file = open(path, 'wb')
+
+    def write_rows(self, rows):
+        lines = ''.join(
+            json.dumps(dict(zip(COLUMN_NAMES, row)), ensure_ascii=False, default=json_default) + '\n'
+            for row in rows
+        ).encode('utf-8')
+        self.file.write(self.compressor.compress(lines) if self.compressor else lines)
+
+    def close(self):
+        if self.compressor:
+            self.file.write(self.compressor.flush())
+        self.file.close()
+
+
+EXPORTERS = {
+    'parquet': ParquetExporter,
+    'ndjson': NdjsonExporter,
+}
+
+
+def make_exporter(export_format, path, compression=None):
+    if export_format not in EXPORTERS:
+        raise ValueError('Unknown export format {}'.format(export_format))
+    if compression:
+        return EXPORTERS[export_format](path, compression=compression)
+    return EXPORTERS[export_format](path)
+
+
+def select_state(cursor, name):
+    sql_string = """
+        SELECT
+            "exported_until"
+        FROM "export_state"
+        WHERE name = %s;
+    """
+    cursor.execute(sql_string, (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def save_state(cursor, name, exported_until):
+    sql_string = """
+        INSERT INTO "export_state" ("name", "exported_until", "exported_at")
+        VALUES (%s, %s::timestamp AT TIME ZONE 'UTC', now())
+        ON CONFLICT ("name")
+        DO
+            UPDATE
+                SET exported_until = EXCLUDED.exported_until,
+                    exported_at = EXCLUDED.exported_at;
+    """
+    cursor.execute(sql_string, (name, exported_until))
+
+
+def select_safe_until(cursor):
+    # changed_at is the start of the writing transaction, one still running when the
+    # export starts commits rows older than what it exports; the watermark stays below
+    # its start so the next export picks them up (needs to see the sessions of the
+    # writing role in pg_stat_activity, same role or pg_read_all_stats)
+    sql_string = """
+        SELECT
+            least(clock_timestamp(), min("xact_start")) AT TIME ZONE 'UTC'
+        FROM "pg_stat_activity"
+        WHERE "datname" = current_database()
+          AND "pid" <> pg_backend_pid();
+    """
+    cursor.execute(sql_string)
+    return cursor.fetchone()[0] - datetime.timedelta(microseconds=1)
+
+
+def export(connection, exporter, state_name=None, chunk_size=CHUNK_SIZE):
+    """Stream finished exhibitors into exporter and close it, with state_name only
+    the rows changed since the last export under that name. Returns the row count."""
+    sql_string = EXPORT_SQL
+    parameters = ()
+    if state_name:
+        with connection.cursor() as cursor:
+            since = select_state(cursor, state_name)
+            # read before the export query takes its snapshot
+            safe_until = select_safe_until(cursor)
+        # the first export under a name has no state and takes every row
+        if since is not None:
+            sql_string += INCREMENTAL_SQL
+            parameters = (since,)
+
+    export_format = type(exporter).__name__
+    changed_at = COLUMN_NAMES.index('changed_at')
+    exported = 0
+    exported_until = None
+    try:
+        # named cursor: the result stays on the server, one chunk is held at a time
+        with connection.cursor(name='export_rows') as cursor:
+            cursor.execute(sql_string, parameters)
+            while True:
+                with METRICS.timer('export_fetch', exporter=export_format):
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                with METRICS.timer('export_write', exporter=export_format):
+                    exporter.write_rows(rows)
+                exported += len(rows)
+                METRICS.increment('export_rows_total', len(rows), exporter=export_format)
+                for row in rows:
+                    if row[changed_at] is not None and (exported_until is None or row[changed_at] > exported_until):
+                        exported_until = row[changed_at]
+    finally:
+        exporter.close()
+
+    # the state moves only once the file is complete, rows between safe_until and
+    # exported_until are exported again next time
+    if state_name and exported_until is not None:
+        exported_until = min(exported_until, safe_until)
+        with connection.cursor() as cursor:
+            save_state(cursor, state_name, exported_until)
+    connection.commit()
+    return exported
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--format', choices=sorted(EXPORTERS), default='parquet')
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--compression', help='parquet: snappy, gzip, zstd; ndjson: gzip, zstd, none')
+    parser.add_argument('--incremental', metavar='NAME', help='only rows changed since the last export under NAME')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    start_from_env()
+    with db.connect() as connection:
+        exported = export(
+            connection,
+            make_exporter(args.format, args.output, args.compression),
+            state_name=args.incremental,
+            chunk_size=args.chunk_size,
+        )
+    logger.warning('Exported {} rows to {}'.format(exported, args.output))
+    log_summary()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import json
+import sys
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from exhibitor_parser import parse_exhibitor_html
+from metrics import METRICS
+from page_cache import default_cache
+from routing import scheduler_from_env
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/67.0.3396.99 Safari/537.36'
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpFetcher(object):
+    # plain HTTP GET over a pool of keep-alive connections, no browser involved;
+    # with a scheduler every route gets its own session and retries go through the scheduler
+
+    def __init__(self, pool_size=10, timeout=30, retries=2, cache=None, scheduler=None, backoff=0.5):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.scheduler = scheduler
+        self.sessions = {}
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+        )
+        self.session = self.make_session(retry)
+
+    def make_session(self, retry, proxy=None):
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        if proxy:
+            session.proxies = {'http': proxy, 'https': proxy}
+
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def route_session(self, route):
+        session = self.sessions.get(route.name)
+        if session is None:
+            # no urllib3 retries, every status has to reach the scheduler
+            session = self.sessions[route.name] = self.make_session(0, route.proxy)
+        return session
+
+    def get(self, url, parse):
+        # returns parse(content), only content that parses is cached: a blank or
+        # throttled page is fetched again instead of being served from the cache
+        if self.cache is not None:
+            content = self.cache.get(url)
+            if content is not None:
+                result = parse(content)
+                if result is not None:
+                    return result
+
+        if self.scheduler is None:
+            with METRICS.timer('page_load', fetcher='http'):
+                response = self.session.get(url, timeout=self.timeout)
+        else:
+            response = self.get_scheduled(url)
+        response.raise_for_status()
+        result = parse(response.content)
+        if result is not None and self.cache is not None:
+            self.cache.put(url, response.content)
+        return result
+
+    def get_scheduled(self, url):
+        # retried here so the scheduler sees every attempt and can move the next one to another route
+        for attempt in range(self.retries + 1):
+            ticket = self.scheduler.acquire(url)
+            try:
+                with METRICS.timer('page_load', fetcher='http'):
+                    response = self.route_session(ticket.route).get(url, timeout=self.timeout)
+            except requests.RequestException:
+                self.scheduler.release(ticket, failed=True)
+                if attempt == self.retries:
+                    raise
+            else:
+                self.scheduler.release(ticket, response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            METRICS.increment('scrape_retries_total', fetcher='http')
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def get_exhibitors_data(self, exhibitors_url):
+        # None means the page needs a real browser (no content block in the raw html)
+        def parse(content):
+            with METRICS.timer('field_extraction', fetcher='http'):
+                return parse_exhibitor_html(content)
+
+        product = self.get(exhibitors_url, parse)
+        METRICS.increment('scrape_pages_total', page='exhibitor', fetcher='http', result='success' if product else 'needs_browser')
+        return product
+
+    def close(self):
+        self.session.close()
+        for session in self.sessions.values():
+            session.close()
+
+
+if __name__ == '__main__':
+    fetcher = HttpFetcher(cache=default_cache(), scheduler=scheduler_from_env())
+    for url in sys.argv[1:]:
+        print(json.dumps(fetcher.get_exhibitors_data(url), ensure_ascii=False, indent=4))
+    fetcher.close()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import hashlib
+import json
+import logging
+from collections import namedtuple
+
+import db
+from async_crawler import AsyncCrawler
+from exhibitor_parser import parse_exhibitor_html
+from metrics import METRICS, log_summary, start_from_env
+from routing import scheduler_from_env
+from write_buffer import ExhibitorDataBuffer, StagedUpdateBuffer, WriteBuffer
+
+logger = logging.getLogger(__name__)
+
+FetchJob = namedtuple('FetchJob', ['url', 'etag', 'last_modified', 'content_hash'])
+
+
+def content_hash(product):
+    return hashlib.sha1(json.dumps(product, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def select_stale_jobs(cursor, max_age_hours, limit=None, max_backoff_hours=24 * 30):
+    # never fetched rows first, then the oldest fetches; a row whose last fetch
+    # failed waits max_age_hours * 2 ** fetch_failures before it is tried again
+    sql_string = """
+        SELECT
+            "url",
+            "etag",
+            "last_modified",
+            "content_hash"
+        FROM "exhibitor"
+        WHERE ("fetched_at" IS NULL
+               OR "fetched_at" < now() - %s * interval '1 hour')
+          AND ("fetch_failed_at" IS NULL
+               OR "fetch_failed_at" < now() - least(%s * 2 ^ "fetch_failures", %s) * interval '1 hour')
+        ORDER BY "fetched_at" ASC NULLS FIRST
+        LIMIT %s;
+    """
+    cursor.execute(sql_string, (max_age_hours, max_age_hours, max_backoff_hours, limit))
+    return [FetchJob(*row) for row in cursor.fetchall()]
+
+
+class ChangedDataBuffer(ExhibitorDataBuffer):
+    stage_table = 'exhibitor_changed_stage'
+    columns = ExhibitorDataBuffer.columns + ['etag', 'last_modified', 'content_hash']
+    extra_assignments = [
+        '"is_done" = true', '"fetched_at" = now()', '"changed_at" = now()',
+        '"fetch_failed_at" = NULL', '"fetch_failures" = 0',
+    ]
+
+
+class FetchStateBuffer(StagedUpdateBuffer):
+    # unchanged pages only move fetched_at and the validators, the fields stay as they are
+    stage_table = 'exhibitor_fetch_stage'
+    columns = ['etag', 'last_modified']
+    extra_assignments = ['"fetched_at" = now()', '"fetch_failed_at" = NULL', '"fetch_failures" = 0']
+
+
+class FetchFailureBuffer(WriteBuffer):
+    # failed fetches and pages that need a browser, they back off in select_stale_jobs
+
+    def add_failure(self, url):
+        self.add(url, ())
+
+    def write(self, cursor, rows):
+        cursor.execute("""
+            UPDATE "exhibitor" SET
+                "fetch_failed_at" = now(),
+                "fetch_failures" = "fetch_failures" + 1
+            WHERE "url" = ANY(%s);
+        """, ([row[0] for row in rows],))
+
+
+class IncrementalCrawler(AsyncCrawler):
+    # jobs are FetchJob tuples, on_result(job, product, validators) gets
+    # product None when the page did not change since the last fetch and
+    # validators None when the fetch failed or the page needs a browser
+
+    async def worker(self, session, queue, on_result):
+        while True:
+            job = await queue.get()
+            try:
+                headers = {}
+                if job.etag:
+                    headers['If-None-Match'] = job.etag
+                if job.last_modified:
+                    headers['If-Modified-Since'] = job.last_modified
+
+                status, response_headers, body = await self.fetch_response(session, job.url, headers)
+                validators = {
+                    'etag': response_headers.get('ETag', job.etag),
+                    'last_modified': response_headers.get('Last-Modified', job.last_modified),
+                }
+
+                if status == 304:
+                    METRICS.increment('incremental_pages_total', result='not_modified')
+                    product = None
+                else:
+                    with METRICS.timer('field_extraction', fetcher='async'):
+                        product = parse_exhibitor_html(body)
+                    if product is None:
+                        METRICS.increment('incremental_pages_total', result='needs_browser')
+                        logger.warning('--> Product needs a browser {}'.format(job.url))
+                        on_result(job, None, None)
+                        continue
+                    if content_hash(product) == job.content_hash:
+                        METRICS.increment('incremental_pages_total', result='unchanged')
+                        product = None
+                    else:
+                        METRICS.increment('incremental_pages_total', result='changed')
+            except Exception as e:
+                METRICS.increment('incremental_pages_total', result='failed')
+                logger.warning('--> Product failed {}: {!r}'.format(job.url, e))
+                on_result(job, None, None)
+            else:
+                on_result(job, product, validators)
+            finally:
+                queue.task_done()
+
+
+def recrawl(crawler, max_age_hours=24, limit=None):
+    with db.connect() as connection:
+        with connection.cursor() as cursor:
+            jobs = select_stale_jobs(cursor, max_age_hours, limit)
+        connection.commit()
+
+        stats = {'changed': 0, 'unchanged': 0, 'failed': 0}
+        with ChangedDataBuffer(connection) as changed, FetchStateBuffer(connection) as unchanged, \
+                FetchFailureBuffer(connection) as failed:
+            changed.start_timer()
+            unchanged.start_timer()
+            failed.start_timer()
+
+            def on_result(job, product, validators):
+                if validators is None:
+                    stats['failed'] += 1
+                    failed.add_failure(job.url)
+                    return
+                if product is None:
+                    stats['unchanged'] += 1
+                    unchanged.add_values(job.url, validators)
+                    return
+                stats['changed'] += 1
+                data = dict(product, content_hash=content_hash(product), **validators)
+                changed.add_product(job.url, data)
+
+            crawler.run(jobs, on_result)
+
+        logger.warning('Re-crawl done: {} jobs, {changed} changed, {unchanged} unchanged, {failed} failed'.format(len(jobs), **stats))
+        return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-age-hours', type=float, default=24, help='re-fetch rows fetched longer ago than this')
+    parser.add_argument('--limit', type=int, default=None, help='stale rows per run, all of them by default')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests per second per host, 0 is unlimited')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    start_from_env()
+    recrawl(
+        IncrementalCrawler(concurrency=args.concurrency, rate_limit=args.rate_limit, scheduler=scheduler_from_env()),
+        max_age_hours=args.max_age_hours,
+        limit=args.limit,
+    )
+    log_summary()
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from dotenv import load_dotenv
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+DOTENV_PATH = os.path.join(BASE_PATH, '.env')
+load_dotenv(DOTENV_PATH)
+
+logger = logging.getLogger(__name__)
+
+# seconds, chosen around the page loads we see: tens of ms over HTTP up to the 300 s selenium waits
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=BUCKETS, samples=2000):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # recent observations for quantiles, bucket bounds are too coarse for that
+        self.samples = deque(maxlen=samples)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, value) for name, value in pairs) + '}'
+
+
+class Metrics(object):
+    # counters and latency histograms shared by every stage of a run
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        # a stage that raised (a timed out wait) is kept under result="failed",
+        # the latency of the ones that worked is what wait_timeout follows
+        started = time.time()
+        try:
+            yield
+        except BaseException:
+            self.observe('scrape_stage_seconds', time.time() - started, stage=stage, result='failed', **labels)
+            raise
+        self.observe('scrape_stage_seconds', time.time() - started, stage=stage, **labels)
+
+    def histogram(self, name, **labels):
+        with self.lock:
+            return self.histograms.get((name, label_key(labels)))
+
+    def quantile(self, name, q, min_count=1, **labels):
+        # None until min_count observations were made
+        with self.lock:
+            histogram = self.histograms.get((name, label_key(labels)))
+            if histogram is None or histogram.count < min_count:
+                return None
+            return histogram.quantile(q)
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for (name, key), value in sorted(self.counters.items()):
+                lines.append('{}{} {}'.format(name, format_labels(key), value))
+            for (name, key), histogram in sorted(self.histograms.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append('{}_bucket{} {}'.format(name, format_labels(key, [('le', bound)]), count))
+                lines.append('{}_bucket{} {}'.format(name, format_labels(key, [('le', '+Inf')]), histogram.count))
+                lines.append('{}_sum{} {}'.format(name, format_labels(key), histogram.sum))
+                lines.append('{}_count{} {}'.format(name, format_labels(key), histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'uptime': time.time() - self.started,
+                'counters': [
+                    {'name': name, 'labels': dict(key), 'value': value}
+                    for (name, key), value in sorted(self.counters.items())
+                ],
+                'histograms': [
+                    dict(histogram.as_dict(), name=name, labels=dict(key))
+                    for (name, key), histogram in sorted(self.histograms.items())
+                ],
+            }
+
+    def summary(self):
+        data = self.as_dict()
+        lines = ['Run summary after {:.0f}s'.format(data['uptime'])]
+        for histogram in data['histograms']:
+            lines.append('  {:<40} n={:<7} mean={:.3f}s p50={:.3f}s p95={:.3f}s max={:.3f}s'.format(
+                histogram['name'] + format_labels(sorted(histogram['labels'].items())),
+                histogram['count'], histogram['mean'], histogram['p50'], histogram['p95'], histogram['max'],
+            ))
+        for counter in data['counters']:
+            lines.append('  {:<40} {}'.format(
+                counter['name'] + format_labels(sorted(counter['labels'].items())),
+                counter['value'],
+            ))
+        return '\n'.join(lines)
+
+
+METRICS = Metrics()
+
+exporters_started = False
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body, content_type = json.dumps(METRICS.as_dict()), 'application/json'
+        else:
+            body, content_type = METRICS.render_prometheus(), 'text/plain; version=0.0.4'
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='0.0.0.0'):
+    # /metrics in prometheus text format, /metrics.json as json
+    server = HTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def start_json_dump(path, interval=60):
+    def dump():
+        while True:
+            time.sleep(interval)
+            tmp_path = '{}.tmp'.format(path)
+            with open(tmp_path, 'w') as dump_file:
+                json.dump(METRICS.as_dict(), dump_file)
+            os.replace(tmp_path, path)
+
+    thread = threading.Thread(target=dump)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def start_from_env():
+    # METRICS_PORT serves the endpoint, METRICS_JSON_PATH gets a dump every METRICS_INTERVAL seconds
+    global exporters_started
+    if exporters_started:
+        return
+    exporters_started = True
+
+    port = os.getenv('METRICS_PORT')
+    if port:
+        start_http_server(int(port))
+    path = os.getenv('METRICS_JSON_PATH')
+    if path:
+        start_json_dump(path, float(os.getenv('METRICS_INTERVAL', 60)))
+
+
+def log_summary():
+    logger.warning(METRICS.summary())
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import logging
+import os
+
+import db
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+MIGRATIONS_PATH = os.path.join(BASE_PATH, 'migrations')
+
+# any constant works, it only has to be the same for every process running migrate
+MIGRATION_LOCK_ID = 20180412
+
+logger = logging.getLogger(__name__)
+
+
+def migration_files(path=MIGRATIONS_PATH):
+    # 0001_baseline.sql -> ('0001_baseline', path), applied in name order
+    return [
+        (file_name[:-len('.sql')], os.path.join(path, file_name))
+        for file_name in sorted(os.listdir(path))
+        if file_name.endswith('.sql')
+    ]
+
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS "schema_migration" (
+            "version" text PRIMARY KEY,
+            "applied_at" timestamp with time zone DEFAULT now()
+        );
+    """)
+    cursor.execute('SELECT "version" FROM "schema_migration";')
+    return set(row[0] for row in cursor.fetchall())
+
+
+def migrate(connection, target=None, path=MIGRATIONS_PATH):
+    # every migration runs in its own transaction, a failed one leaves the earlier ones applied
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s);', (MIGRATION_LOCK_ID,))
+    try:
+        with connection.cursor() as cursor:
+            applied = applied_versions(cursor)
+        connection.commit()
+
+        done = []
+        for version, file_path in migration_files(path):
+            if target and version > target:
+                break
+            if version in applied:
+                continue
+            with open(file_path, encoding='utf-8') as migration_file:
+                sql_string = migration_file.read()
+            logger.warning('Applying {}'.format(version))
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql_string)
+                    cursor.execute('INSERT INTO "schema_migration" ("version") VALUES (%s);', (version,))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            done.append(version)
+        return done
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s);', (MIGRATION_LOCK_ID,))
+        connection.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--target', help='stop after this version, e.g. 0004_pending_index')
+    parser.add_argument('--list', action='store_true', help='show applied and pending migrations')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    with db.connect() as connection:
+        if args.list:
+            with connection.cursor() as cursor:
+                applied = applied_versions(cursor)
+            connection.commit()
+            for version, _ in migration_files():
+                print('{} {}'.format('applied' if version in applied else 'pending', version))
+        else:
+            done = migrate(connection, args.target)
+            logger.warning('{} migrations applied'.format(len(done)))
@@ -0,0 +1,53 @@
+-- Schema as of db.sql before the migrations, safe to run on a database created from that dump
+
+CREATE SEQUENCE IF NOT EXISTS exhibitors_id_seq;
+
+CREATE TABLE IF NOT EXISTS exhibitor (
+    id integer NOT NULL DEFAULT nextval('exhibitors_id_seq'::regclass),
+    url character varying(2044) NOT NULL,
+    is_done boolean DEFAULT false,
+    company_name character varying(2044),
+    address character varying(2044),
+    city_province character varying(2044),
+    post_code character varying(2044),
+    website character varying(2044),
+    main_products character varying(2044),
+    international_commercial_terms character varying(2044),
+    exhibition_records character varying(2044),
+    number_of_staff character varying(2044),
+    registered_capital character varying(2044),
+    business_type character varying(2044),
+    target_customer character varying(2044),
+    category_name character varying(2044),
+    CONSTRAINT exhibitors_pkey PRIMARY KEY (id),
+    CONSTRAINT exhibitor_url_key UNIQUE (url)
+);
+
+ALTER SEQUENCE exhibitors_id_seq OWNED BY exhibitor.id;
+
+-- incremental re-crawl
+ALTER TABLE exhibitor
+    ADD COLUMN IF NOT EXISTS fetched_at timestamp with time zone,
+    ADD COLUMN IF NOT EXISTS changed_at timestamp with time zone,
+    ADD COLUMN IF NOT EXISTS etag character varying(2044),
+    ADD COLUMN IF NOT EXISTS last_modified character varying(2044),
+    ADD COLUMN IF NOT EXISTS content_hash character(40);
+
+CREATE INDEX IF NOT EXISTS exhibitor_fetched_at_idx ON exhibitor USING btree (fetched_at NULLS FIRST);
+
+-- direct pagination
+CREATE TABLE IF NOT EXISTS category (
+    id serial PRIMARY KEY,
+    url character varying(2044) NOT NULL UNIQUE,
+    name character varying(2044),
+    max_page integer,
+    is_done boolean DEFAULT false
+);
+
+CREATE TABLE IF NOT EXISTS category_page (
+    category_id integer NOT NULL REFERENCES category (id) ON DELETE CASCADE,
+    page_id integer NOT NULL,
+    links integer NOT NULL,
+    done_at timestamp with time zone DEFAULT now(),
+    PRIMARY KEY (category_id, page_id)
+);
@@ -0,0 +1,5 @@
+-- url is always the scraped link, it never came from a sequence
+
+ALTER TABLE exhibitor ALTER COLUMN url DROP DEFAULT;
+
+DROP SEQUENCE IF EXISTS exhibitors_url_seq;
@@ -0,0 +1,19 @@
+-- varchar(2044) only added a length check, text is stored the same way (no table rewrite)
+
+ALTER TABLE exhibitor
+    ALTER COLUMN url TYPE text,
+    ALTER COLUMN company_name TYPE text,
+    ALTER COLUMN address TYPE text,
+    ALTER COLUMN city_province TYPE text,
+    ALTER COLUMN post_code TYPE text,
+    ALTER COLUMN website TYPE text,
+    ALTER COLUMN main_products TYPE text,
+    ALTER COLUMN international_commercial_terms TYPE text,
+    ALTER COLUMN exhibition_records TYPE text,
+    ALTER COLUMN number_of_staff TYPE text,
+    ALTER COLUMN registered_capital TYPE text,
+    ALTER COLUMN business_type TYPE text,
+    ALTER COLUMN target_customer TYPE text,
+    ALTER COLUMN category_name TYPE text,
+    ALTER COLUMN etag TYPE text,
+    ALTER COLUMN last_modified TYPE text;
@@ -0,0 +1,8 @@
+-- the queue: select_pending_urls / claim_pending_urls read is_done = false in id order,
+-- the index only holds the pending rows so it shrinks as the crawl goes on
+
+UPDATE exhibitor SET is_done = false WHERE is_done IS NULL;
+
+ALTER TABLE exhibitor ALTER COLUMN is_done SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS exhibitor_pending_idx ON exhibitor USING btree (id) WHERE is_done = false;
@@ -0,0 +1,20 @@
+-- parsed once at ingest (exhibitor_parser.numeric_fields), backfilled here with the same rules:
+-- '5,000,000 YUAN' -> 5000000, '201-500People' -> 201 / 500, 'Below 50People' -> NULL / 50
+
+ALTER TABLE exhibitor
+    ADD COLUMN IF NOT EXISTS registered_capital_yuan numeric,
+    ADD COLUMN IF NOT EXISTS staff_min integer,
+    ADD COLUMN IF NOT EXISTS staff_max integer;
+
+UPDATE exhibitor SET
+    registered_capital_yuan = NULLIF(regexp_replace(registered_capital, '[^0-9]', '', 'g'), '')::numeric,
+    staff_min = CASE
+        WHEN number_of_staff ~* 'below|less|under' THEN NULL
+        ELSE substring(replace(number_of_staff, ',', '') from '[0-9]+')::integer
+    END,
+    staff_max = CASE
+        WHEN number_of_staff ~* 'below|less|under' THEN substring(replace(number_of_staff, ',', '') from '([0-9]+)[^0-9]*$')::integer
+        WHEN number_of_staff ~* 'above|more|over' THEN NULL
+        ELSE substring(replace(number_of_staff, ',', '') from '([0-9]+)[^0-9]*$')::integer
+    END
+WHERE registered_capital IS NOT NULL OR number_of_staff IS NOT NULL;
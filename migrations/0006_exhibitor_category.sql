@@ -0,0 +1,21 @@
+-- category names are stored once, exhibitor rows point at them
+
+CREATE TABLE IF NOT EXISTS exhibitor_category (
+    id serial PRIMARY KEY,
+    name text NOT NULL UNIQUE
+);
+
+INSERT INTO exhibitor_category (name)
+SELECT DISTINCT category_name FROM exhibitor WHERE category_name IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+
+ALTER TABLE exhibitor ADD COLUMN IF NOT EXISTS category_id integer REFERENCES exhibitor_category (id);
+
+UPDATE exhibitor SET
+    category_id = exhibitor_category.id
+FROM exhibitor_category
+WHERE exhibitor_category.name = exhibitor.category_name;
+
+ALTER TABLE exhibitor DROP COLUMN category_name;
+
+CREATE INDEX IF NOT EXISTS exhibitor_category_id_idx ON exhibitor USING btree (category_id);
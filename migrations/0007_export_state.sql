@@ -0,0 +1,14 @@
+-- incremental exports: every data write sets changed_at, export_state keeps the
+-- newest changed_at each named export has written out
+
+CREATE TABLE IF NOT EXISTS export_state (
+    name text PRIMARY KEY,
+    exported_until timestamp with time zone NOT NULL,
+    exported_at timestamp with time zone DEFAULT now()
+);
+
+UPDATE exhibitor SET
+    changed_at = coalesce(fetched_at, now())
+WHERE is_done = true AND changed_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS exhibitor_changed_at_idx ON exhibitor USING btree (changed_at);
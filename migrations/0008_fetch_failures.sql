@@ -0,0 +1,6 @@
+-- incremental re-crawl: a failed fetch (or a page that needs a browser) is
+-- recorded so the row backs off instead of heading every run
+
+ALTER TABLE exhibitor
+    ADD COLUMN IF NOT EXISTS fetch_failed_at timestamp with time zone,
+    ADD COLUMN IF NOT EXISTS fetch_failures integer NOT NULL DEFAULT 0;
@@ -0,0 +1,21 @@
+-- the write buffers used to COPY empty fields in as NULL, db.update_exhibitor
+-- stores '': finished rows get '' everywhere so the exports see one kind of empty
+
+UPDATE exhibitor SET
+    address = coalesce(address, ''),
+    business_type = coalesce(business_type, ''),
+    city_province = coalesce(city_province, ''),
+    company_name = coalesce(company_name, ''),
+    exhibition_records = coalesce(exhibition_records, ''),
+    international_commercial_terms = coalesce(international_commercial_terms, ''),
+    main_products = coalesce(main_products, ''),
+    number_of_staff = coalesce(number_of_staff, ''),
+    post_code = coalesce(post_code, ''),
+    registered_capital = coalesce(registered_capital, ''),
+    target_customer = coalesce(target_customer, ''),
+    website = coalesce(website, '')
+WHERE is_done = true
+  AND (address IS NULL OR business_type IS NULL OR city_province IS NULL OR company_name IS NULL
+       OR exhibition_records IS NULL OR international_commercial_terms IS NULL OR main_products IS NULL
+       OR number_of_staff IS NULL OR post_code IS NULL OR registered_capital IS NULL
+       OR target_customer IS NULL OR website IS NULL);
@@ -0,0 +1,31 @@
+-- one category table: exhibitor.category_id points at category (the listings
+-- pagination and the browser pool work through) instead of exhibitor_category
+
+ALTER TABLE category
+    ALTER COLUMN url TYPE text,
+    ALTER COLUMN name TYPE text;
+
+-- names only ever seen on exhibitor rows keep a category without a url, done so
+-- it is never claimed
+ALTER TABLE category ALTER COLUMN url DROP NOT NULL;
+
+INSERT INTO category (name, is_done)
+SELECT exhibitor_category.name, true
+FROM exhibitor_category
+WHERE NOT EXISTS (SELECT 1 FROM category WHERE category.name = exhibitor_category.name);
+
+ALTER TABLE exhibitor DROP CONSTRAINT IF EXISTS exhibitor_category_id_fkey;
+
+UPDATE exhibitor SET
+    category_id = (
+        SELECT min(category.id)
+        FROM category
+        JOIN exhibitor_category ON exhibitor_category.name = category.name
+        WHERE exhibitor_category.id = exhibitor.category_id
+    )
+WHERE category_id IS NOT NULL;
+
+ALTER TABLE exhibitor
+    ADD CONSTRAINT exhibitor_category_id_fkey FOREIGN KEY (category_id) REFERENCES category (id);
+
+DROP TABLE exhibitor_category;
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from exhibitor_parser import parse_exhibitor_html
+from metrics import METRICS, log_summary
+from page_cache import PAGE_CACHE_PATH, PageCache, read_blob_file
+
+logger = logging.getLogger(__name__)
+
+
+def parse_batch(jobs):
+    # runs in a worker process: jobs are (url, path, compressed), only paths cross the process boundary
+    results = []
+    for url, path, compressed in jobs:
+        if compressed:
+            content = read_blob_file(path)
+        else:
+            with open(path, 'rb') as page_file:
+                content = page_file.read()
+        product = parse_exhibitor_html(content)
+        if product is not None:
+            results.append((url, product))
+    return results
+
+
+def cache_jobs(cache_path, include_expired=False):
+    cache = PageCache(cache_path)
+    for url, path in cache.iter_blob_paths(include_expired):
+        yield url, path, True
+    cache.close()
+
+
+def directory_jobs(path):
+    # saved pages, the file path stands in for the url
+    for root, _, file_names in os.walk(path):
+        for file_name in sorted(file_names):
+            if file_name.endswith('.html'):
+                file_path = os.path.join(root, file_name)
+                yield file_path, file_path, False
+
+
+def parse_pages(jobs, on_result, workers=None, batch_size=200):
+    # at most two batches per worker are in flight, memory stays flat for any number of pages
+    workers = workers or os.cpu_count()
+    jobs = iter(jobs)
+    parsed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        while True:
+            while len(pending) < workers * 2:
+                batch = list(islice(jobs, batch_size))
+                if not batch:
+                    break
+                pending.add(executor.submit(parse_batch, batch))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results = future.result()
+                METRICS.increment('offline_pages_total', len(results), result='parsed')
+                for url, product in results:
+                    on_result(url, product)
+                    parsed += 1
+    return parsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cache', default=PAGE_CACHE_PATH, help='page cache directory')
+    parser.add_argument('--directory', help='parse saved .html files instead of the cache')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=200, help='pages per task sent to a worker')
+    parser.add_argument('--output', choices=('db', 'jsonl'), default='db', help='write to the exhibitor table or print json lines')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    if args.directory:
+        jobs = directory_jobs(args.directory)
+    elif args.cache:
+        jobs = cache_jobs(args.cache)
+    else:
+        parser.error('set PAGE_CACHE_PATH, --cache or --directory')
+
+    started = time.time()
+    if args.output == 'jsonl':
+        parsed = parse_pages(
+            jobs,
+            lambda url, product: sys.stdout.write(json.dumps(dict(product, url=url), ensure_ascii=False) + '\n'),
+            args.workers,
+            args.batch_size,
+        )
+    else:
+        import db
+        from write_buffer import ExhibitorDataBuffer
+
+        with db.connect() as connection:
+            with ExhibitorDataBuffer(connection, flush_rows=2000) as buffer:
+                parsed = parse_pages(jobs, buffer.add_product, args.workers, args.batch_size)
+
+    elapsed = time.time() - started
+    logger.warning('Parsed {} pages in {:.1f}s, {:.0f} pages/sec'.format(parsed, elapsed, parsed / elapsed if elapsed else 0))
+    log_summary()
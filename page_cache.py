@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from dotenv import load_dotenv
+
+from metrics import METRICS
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+DOTENV_PATH = os.path.join(BASE_PATH, '.env')
+load_dotenv(DOTENV_PATH)
+
+PAGE_CACHE_PATH = os.getenv('PAGE_CACHE_PATH')
+PAGE_CACHE_MAX_MB = float(os.getenv('PAGE_CACHE_MAX_MB', 2048))
+PAGE_CACHE_TTL_HOURS = float(os.getenv('PAGE_CACHE_TTL_HOURS', 0))
+
+
+def read_blob_file(path):
+    try:
+        with open(path, 'rb') as blob_file:
+            return zlib.decompress(blob_file.read())
+    except (IOError, zlib.error):
+        return None
+
+
+class PageCache(object):
+    # Raw pages on disk: zlib blobs named by the sha1 of their content, so identical
+    # pages are stored once, and a sqlite index url -> blob with expiry and last access.
+    # When the blobs outgrow max_bytes the least recently used urls are dropped.
+
+    def __init__(self, path, max_bytes=PAGE_CACHE_MAX_MB * 2 ** 20, ttl=PAGE_CACHE_TTL_HOURS * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.join(path, 'objects'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, 'index.sqlite'), timeout=60, check_same_thread=False)
+        self.db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS page (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS page_accessed_at_idx ON page (accessed_at);
+            CREATE INDEX IF NOT EXISTS page_digest_idx ON page (digest);
+            CREATE TABLE IF NOT EXISTS blob (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+        """)
+        # running total of blob sizes, recomputed from the index on every eviction
+        self.total_bytes = self.size()
+
+    def blob_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], digest[2:])
+
+    def get(self, url):
+        with self.lock:
+            row = self.db.execute('SELECT digest, expires_at FROM page WHERE url = ?', (url,)).fetchone()
+            if row is None or (row[1] is not None and row[1] < time.time()):
+                METRICS.increment('page_cache_total', result='miss')
+                return None
+            METRICS.increment('page_cache_total', result='hit')
+            digest = row[0]
+            self.db.execute('UPDATE page SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self.db.commit()
+        return self.read_blob(digest)
+
+    def read_blob(self, digest):
+        return read_blob_file(self.blob_path(digest))
+
+    def put(self, url, content, ttl=None):
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        digest = hashlib.sha1(content).hexdigest()
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+
+        with self.lock:
+            if self.db.execute('SELECT 1 FROM blob WHERE digest = ?', (digest,)).fetchone() is None:
+                data = zlib.compress(content, 6)
+                path = self.blob_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # write then rename, a reader never sees half a blob
+                tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+                with open(tmp_path, 'wb') as blob_file:
+                    blob_file.write(data)
+                os.rename(tmp_path, path)
+                self.db.execute('INSERT OR REPLACE INTO blob (digest, size) VALUES (?, ?)', (digest, len(data)))
+                self.total_bytes += len(data)
+
+            old = self.db.execute('SELECT digest FROM page WHERE url = ?', (url,)).fetchone()
+            self.db.execute(
+                'INSERT OR REPLACE INTO page (url, digest, stored_at, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?)',
+                (url, digest, now, now, now + ttl if ttl else None),
+            )
+            if old is not None and old[0] != digest:
+                self.drop_unused_blob(old[0])
+            self.db.commit()
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def drop_unused_blob(self, digest):
+        if self.db.execute('SELECT 1 FROM page WHERE digest = ? LIMIT 1', (digest,)).fetchone() is not None:
+            return
+        row = self.db.execute('SELECT size FROM blob WHERE digest = ?', (digest,)).fetchone()
+        if row is not None:
+            self.total_bytes -= row[0]
+        self.db.execute('DELETE FROM blob WHERE digest = ?', (digest,))
+        try:
+            os.remove(self.blob_path(digest))
+        except OSError:
+            pass
+
+    def size(self):
+        return self.db.execute('SELECT coalesce(sum(size), 0) FROM blob').fetchone()[0]
+
+    def evict(self):
+        # expired pages go first, then the least recently used ones; expects self.lock to be held
+        self.db.execute('DELETE FROM page WHERE expires_at IS NOT NULL AND expires_at < ?', (time.time(),))
+        for digest, in self.db.execute('SELECT digest FROM blob WHERE digest NOT IN (SELECT digest FROM page)').fetchall():
+            self.drop_unused_blob(digest)
+
+        self.total_bytes = self.size()
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute('SELECT url, digest FROM page ORDER BY accessed_at LIMIT 100').fetchall()
+            if not rows:
+                break
+            for url, digest in rows:
+                self.db.execute('DELETE FROM page WHERE url = ?', (url,))
+                self.drop_unused_blob(digest)
+                # pages are read 100 at a time but dropped only until the cache fits
+                if self.total_bytes <= self.max_bytes:
+                    break
+        self.db.commit()
+        self.total_bytes = self.size()
+
+    def iter_pages(self, include_expired=False):
+        for url, path in self.iter_blob_paths(include_expired):
+            content = read_blob_file(path)
+            if content is not None:
+                yield url, content
+
+    def iter_blob_paths(self, include_expired=False):
+        # (url, blob path) without reading the blobs, for readers in other processes
+        query = 'SELECT url, digest FROM page'
+        parameters = ()
+        if not include_expired:
+            query += ' WHERE expires_at IS NULL OR expires_at >= ?'
+            parameters = (time.time(),)
+        with self.lock:
+            rows = self.db.execute(query, parameters).fetchall()
+        for url, digest in rows:
+            yield url, self.blob_path(digest)
+
+    def stats(self):
+        pages, = self.db.execute('SELECT count(*) FROM page').fetchone()
+        blobs, = self.db.execute('SELECT count(*) FROM blob').fetchone()
+        return {'pages': pages, 'blobs': blobs, 'bytes': self.size(), 'max_bytes': self.max_bytes}
+
+    def close(self):
+        self.db.close()
+
+
+def default_cache():
+    # PAGE_CACHE_PATH in .env turns the cache on for every fetch path
+    if not PAGE_CACHE_PATH:
+        return None
+    return PageCache(PAGE_CACHE_PATH)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=('stats', 'reparse'))
+    parser.add_argument('--path', default=PAGE_CACHE_PATH or os.path.join(BASE_PATH, 'cache'))
+    parser.add_argument('--include-expired', action='store_true')
+    args = parser.parse_args()
+
+    cache = PageCache(args.path)
+    if args.command == 'stats':
+        print(json.dumps(cache.stats(), indent=4))
+    elif args.command == 'reparse':
+        # offline run of the current parser over every cached detail page, one json line per page
+        from exhibitor_parser import parse_exhibitor_html
+        for url, content in cache.iter_pages(args.include_expired):
+            product = parse_exhibitor_html(content)
+            if product is not None:
+                sys.stdout.write(json.dumps(dict(product, url=url), ensure_ascii=False) + '\n')
+    cache.close()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import logging
+import os
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from psycopg2.extras import execute_values
+
+import db
+from async_crawler import AsyncCrawler
+from categories import CATEGORY_LIST
+from exhibitor_parser import parse_listing_html
+from metrics import METRICS, log_summary, start_from_env
+from page_cache import default_cache
+from routing import scheduler_from_env
+from write_buffer import WriteBuffer, upsert_links
+
+logger = logging.getLogger(__name__)
+
+# query parameter that selects a page of SearchResult/Index
+PAGE_PARAM = os.getenv('PAGE_PARAM', 'PageIndex')
+
+PageJob = namedtuple('PageJob', ['category_id', 'url', 'page_id'])
+
+
+def page_url(category_url, page_id, page_param=PAGE_PARAM):
+    if page_id == 1:
+        return category_url
+    parts = urlsplit(category_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != page_param]
+    query.append((page_param, str(page_id)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class ListingPageBuffer(WriteBuffer):
+    # links of a page and its checkpoint are committed in the same transaction,
+    # so a checkpointed page never misses links after a crash
+
+    def add_page(self, job, links, category):
+        self.add((job.category_id, job.page_id), (links, category))
+
+    def write(self, cursor, rows):
+        links = {}
+        for (category_id, _), page_links, category in rows:
+            for link in page_links:
+                links[link] = (category_id, category)
+        upsert_links(cursor, [(link, category_id, category) for link, (category_id, category) in links.items()])
+
+        sql_string = """
+            INSERT INTO "category_page" ("category_id", "page_id", "links")
+            VALUES %s
+            ON CONFLICT DO NOTHING;
+        """
+        execute_values(cursor, sql_string, [key + (len(page_links),) for key, page_links, _ in rows])
+
+
+class ListingCrawler(AsyncCrawler):
+    # jobs are PageJob tuples, every page is fetched and retried on its own
+
+    def __init__(self, page_param=PAGE_PARAM, **kwargs):
+        AsyncCrawler.__init__(self, **kwargs)
+        self.page_param = page_param
+
+    async def worker(self, session, queue, on_result):
+        while True:
+            job = await queue.get()
+            try:
+                url = page_url(job.url, job.page_id, self.page_param)
+                listing = await self.fetch(session, url, lambda body: parse_listing_html(body, url))
+                if listing is None:
+                    METRICS.increment('scrape_pages_total', page='listing', fetcher='async', result='stalled')
+                    logger.warning('--> Page stalled {} page {}'.format(job.url, job.page_id))
+                    continue
+                if listing[3] != job.page_id:
+                    # the site ignored the page parameter, checkpointing would finish the category with page 1 only
+                    METRICS.increment('scrape_pages_total', page='listing', fetcher='async', result='wrong_page')
+                    logger.warning('--> Page {} of {} came back as page {}, check PAGE_PARAM'.format(job.page_id, job.url, listing[3]))
+                    continue
+                METRICS.increment('scrape_pages_total', page='listing', fetcher='async', result='success')
+            except Exception as e:
+                logger.warning('--> Page failed {} page {}: {!r}'.format(job.url, job.page_id, e))
+            else:
+                on_result(job, listing)
+            finally:
+                queue.task_done()
+
+
+class PaginationEngine(object):
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+
+    def run(self, category_urls=CATEGORY_LIST):
+        with db.connect() as connection:
+            with connection.cursor() as cursor:
+                db.seed_categories(cursor, category_urls)
+                categories = db.select_categories(cursor)
+            connection.commit()
+
+            with ListingPageBuffer(connection, flush_rows=50) as buffer:
+                # first pages of new categories give the page count
+                page_counts = {}
+                first_jobs = [PageJob(category_id, url, 1) for category_id, url, max_page, _ in categories if max_page is None]
+
+                def on_first_page(job, listing):
+                    links, max_page, category, _ = listing
+                    page_counts[job.category_id] = (max_page, category)
+                    buffer.add_page(job, links, category)
+
+                self.crawler.run(first_jobs, on_first_page)
+                buffer.flush()
+
+                jobs = []
+                with connection.cursor() as cursor:
+                    for category_id, url, max_page, category in categories:
+                        if category_id in page_counts:
+                            max_page, category = page_counts[category_id]
+                            db.set_category_pages(cursor, category_id, max_page, category)
+                        if max_page is None:
+                            continue
+                        done_pages = db.select_done_pages(cursor, category_id)
+                        jobs.extend(
+                            PageJob(category_id, url, page_id)
+                            for page_id in range(1, max_page + 1)
+                            if page_id not in done_pages
+                        )
+                connection.commit()
+
+                self.crawler.run(jobs, lambda job, listing: buffer.add_page(job, listing[0], listing[2]))
+
+            with connection.cursor() as cursor:
+                db.finish_complete_categories(cursor)
+            connection.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests per second per host, 0 is unlimited')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--page-param', default=PAGE_PARAM)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(message)s')
+    start_from_env()
+    crawler = ListingCrawler(
+        page_param=args.page_param,
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        retries=args.retries,
+        cache=default_cache(),
+        scheduler=scheduler_from_env(),
+    )
+    PaginationEngine(crawler).run()
+    log_summary()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from browser import WAIT_MAX, WAIT_MIN, wait_timeout
+from metrics import METRICS
+
+
+class TestWaitTimeout(unittest.TestCase):
+
+    def wait(self, page, seconds, timed_out=False):
+        with mock.patch('metrics.time.time', side_effect=[0, seconds]):
+            try:
+                with METRICS.timer('wait_for_selector', fetcher='selenium', page=page):
+                    if timed_out:
+                        raise TimeoutError()
+            except TimeoutError:
+                pass
+
+    def test_follows_successful_waits(self):
+        self.assertEqual(wait_timeout('test-empty'), WAIT_MAX)
+        for _ in range(50):
+            self.wait('test-fast', 1)
+        self.assertEqual(wait_timeout('test-fast'), WAIT_MIN)
+
+    def test_timeouts_do_not_stretch_the_wait(self):
+        # a throttling site times every wait out, each at the timeout of the one before
+        for _ in range(50):
+            self.wait('test-stalls', 1)
+        for _ in range(4):
+            self.wait('test-stalls', wait_timeout('test-stalls'), timed_out=True)
+        self.assertEqual(wait_timeout('test-stalls'), WAIT_MIN)
+        failed = METRICS.histogram('scrape_stage_seconds', stage='wait_for_selector', fetcher='selenium', page='test-stalls', result='failed')
+        self.assertEqual(failed.count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import psycopg2
+
+from driver_pool import DriverWorker
+
+
+class FakeCursor(object):
+    # fails the UPDATE of one url, the way a constraint or a bad value would
+
+    def __init__(self, urls, failing_url):
+        self.urls = urls
+        self.failing_url = failing_url
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def execute(self, sql_string, parameters=None):
+        if parameters and parameters[-1] == self.failing_url:
+            raise psycopg2.DataError('value out of range')
+        self.statements.append(' '.join(sql_string.split()))
+
+    def fetchall(self):
+        return [(url,) for url in self.urls]
+
+
+class FakeConnection(object):
+
+    def __init__(self, cursor):
+        self.fake_cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self.fake_cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeSession(object):
+
+    def __init__(self):
+        self.route = None
+        self.recycled = 0
+
+    def next_driver(self):
+        return None
+
+    def recycle(self):
+        self.recycled += 1
+
+
+class FakePool(object):
+    batch_size = 3
+
+    def __init__(self):
+        self.failed = set()
+
+    def failed_urls(self):
+        return self.failed
+
+    def mark_failed(self, url):
+        self.failed.add(url)
+
+
+class TestScrapeNextExhibitors(unittest.TestCase):
+
+    def test_database_error_fails_one_row(self):
+        urls = ['http://a', 'http://b', 'http://c']
+        cursor = FakeCursor(urls, 'http://b')
+        connection = FakeConnection(cursor)
+        worker = DriverWorker.__new__(DriverWorker)
+        worker.pool = FakePool()
+        worker.session = FakeSession()
+        worker.get_exhibitors_data = lambda url: {key: '' for key in (
+            'address', 'business_type', 'city_province', 'company_name', 'exhibition_records',
+            'international_commercial_terms', 'main_products', 'number_of_staff', 'post_code',
+            'registered_capital', 'target_customer', 'website',
+        )}
+
+        self.assertTrue(worker.scrape_next_exhibitors(connection))
+        self.assertEqual(worker.pool.failed, {'http://b'})
+        self.assertEqual(worker.session.recycled, 0)
+        self.assertEqual(connection.commits, 1)
+        # the failed row is rolled back to its savepoint, the others are released and committed
+        self.assertEqual(cursor.statements.count('ROLLBACK TO SAVEPOINT "row";'), 1)
+        self.assertEqual(cursor.statements.count('RELEASE SAVEPOINT "row";'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
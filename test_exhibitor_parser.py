@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+
+from exhibitor_parser import parse_exhibitor_html, parse_listing_html
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+FIXTURES_PATH = os.path.join(BASE_PATH, 'fixtures')
+
+DETAIL_PAGE = '''<html><body><div id="content"><div class="cright">
+<span id="Exhi_Name">Example Co.</span>
+<span id="Exhi_Address">No. 18, Example Road<br>Yinzhou District</span>
+</div></div></body></html>'''
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_PATH, name), 'rb') as fixture_file:
+        return fixture_file.read()
+
+
+class TestExhibitorParser(unittest.TestCase):
+
+    def test_exhibitor_page(self):
+        self.assertEqual(parse_exhibitor_html(read_fixture('exhibitor.html')), {
+            'address': 'No. 18, Example Road, Yinzhou District',
+            'business_type': 'Manufacturer',
+            'city_province': 'Zhejiang',
+            'company_name': 'Ningbo Example Household Products Co., Ltd.',
+            'exhibition_records': '121st, 122nd',
+            'international_commercial_terms': 'OEM, ODM',
+            'main_products': 'Kitchenware, Storage Boxes, Cups',
+            'number_of_staff': '201-500People',
+            'post_code': '315100',
+            'registered_capital': '5,000,000 YUAN',
+            'target_customer': 'Wholesaler, Retailer',
+            'website': 'www.example.com',
+        })
+
+    def test_page_needs_browser(self):
+        self.assertIsNone(parse_exhibitor_html(read_fixture('exhibitor_js.html')))
+
+    def test_line_break(self):
+        # WebElement.text / innerText keep <br> as a line break
+        product = parse_exhibitor_html(DETAIL_PAGE)
+        self.assertEqual(product['address'], 'No. 18, Example Road\nYinzhou District')
+        self.assertEqual(product['company_name'], 'Example Co.')
+
+    def test_listing_page(self):
+        page_source = '''<html><body><div id="curmb"><a>Household Items</a></div>
+<div id="gjh_pro_result"><div class="czs-list"><div class="min"><dl><dt>
+<a target="_blank" href="/en/Company/Index?corpid=1">Example Co.</a></dt></dl></div></div></div>
+<div id="pagearea"><span class="pagenumber"><a _pageindex="1">1</a><span class="page_cur">2</span>
+<a _pageindex="3">3</a></span></div></body></html>'''
+        links, max_page, category, current_page = parse_listing_html(page_source, 'http://localhost/en/SearchResult/Index')
+        self.assertEqual(links, ['http://localhost/en/Company/Index?corpid=1'])
+        self.assertEqual((max_page, category, current_page), (3, 'Household Items', 2))
+
+    def test_blank_page(self):
+        for page_source in ('  \n', b'  \n', '<!-- throttled -->'):
+            self.assertIsNone(parse_exhibitor_html(page_source))
+            self.assertIsNone(parse_listing_html(page_source, 'http://localhost/'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import requests
+
+from async_crawler import AsyncCrawler
+from http_fetch import HttpFetcher
+from page_cache import PageCache
+
+BASE_PATH = os.path.dirname(os.path.realpath(__file__))
+FIXTURES_PATH = os.path.join(BASE_PATH, 'fixtures')
+URL = 'http://localhost/en/Company/Index?corpid=1'
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_PATH, name), 'rb') as fixture_file:
+        return fixture_file.read()
+
+
+class FakeSession(object):
+    # answers every get with the next body, 200 each time
+
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+        self.requests = 0
+
+    def get(self, url, timeout=None):
+        self.requests += 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.bodies.pop(0)
+        return response
+
+    def close(self):
+        pass
+
+
+class FakeAsyncCrawler(AsyncCrawler):
+
+    def __init__(self, bodies, **kwargs):
+        AsyncCrawler.__init__(self, **kwargs)
+        self.bodies = list(bodies)
+        self.requests = 0
+
+    async def fetch_response(self, session, url, headers=None):
+        self.requests += 1
+        return 200, {}, self.bodies.pop(0)
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = PageCache(self.path, max_bytes=2 ** 20, ttl=0)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.path)
+
+    def test_blank_page_not_cached(self):
+        # the throttled site answers 200 with a blank page, the next get has to go to the site again
+        fetcher = HttpFetcher(cache=self.cache)
+        fetcher.session = FakeSession([b'  \n', read_fixture('exhibitor.html')])
+
+        self.assertIsNone(fetcher.get_exhibitors_data(URL))
+        self.assertIsNone(self.cache.get(URL))
+        self.assertEqual(fetcher.get_exhibitors_data(URL)['post_code'], '315100')
+        self.assertEqual(fetcher.session.requests, 2)
+
+        # served from the cache from now on
+        self.assertEqual(fetcher.get_exhibitors_data(URL)['post_code'], '315100')
+        self.assertEqual(fetcher.session.requests, 2)
+
+    def test_cached_blank_page_fetched_again(self):
+        # entries stored before only parsed bodies were cached
+        self.cache.put(URL, b'')
+        crawler = FakeAsyncCrawler([read_fixture('exhibitor.html')], cache=self.cache)
+
+        product = asyncio.get_event_loop().run_until_complete(crawler.fetch(None, URL, crawler.parse))
+        self.assertEqual(product['post_code'], '315100')
+        self.assertEqual(crawler.requests, 1)
+        self.assertEqual(self.cache.get(URL), read_fixture('exhibitor.html'))
+
+    def test_evict_stops_once_under_the_cap(self):
+        # 400 random bytes do not compress, every page is a blob of the same size
+        pages = [os.urandom(400) for _ in range(30)]
+        blob_size = len(zlib.compress(pages[0], 6))
+        cache = PageCache(os.path.join(self.path, 'small'), max_bytes=3000, ttl=0)
+        clock = itertools.count(1000)
+        with mock.patch('page_cache.time.time', side_effect=lambda: next(clock)):
+            for i, content in enumerate(pages):
+                cache.put('{}{}'.format(URL, i), content)
+                self.assertLessEqual(cache.total_bytes, 3000)
+            kept = [i for i in range(30) if cache.get('{}{}'.format(URL, i)) is not None]
+        cache.close()
+        # only as many pages as needed are evicted, the most recent ones stay
+        self.assertEqual(len(kept), 3000 // blob_size)
+        self.assertEqual(kept, list(range(30 - len(kept), 30)))
+
+    def test_evict_least_recently_used(self):
+        cache = PageCache(os.path.join(self.path, 'small'), max_bytes=1000, ttl=0)
+        clock = itertools.count(1000)
+        with mock.patch('page_cache.time.time', side_effect=lambda: next(clock)):
+            cache.put(URL + 'a', os.urandom(400))
+            cache.put(URL + 'b', os.urandom(400))
+            cache.get(URL + 'a')
+            cache.put(URL + 'c', os.urandom(400))
+            self.assertIsNotNone(cache.get(URL + 'a'))
+            self.assertIsNone(cache.get(URL + 'b'))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import unittest
+from unittest import mock
+
+from write_buffer import COPY_NULL, ExhibitorDataBuffer, StagedUpdateBuffer, WriteBuffer, copy_rows
+
+
+class FakeCursor(object):
+    # keeps what would have been sent to postgres
+
+    def __init__(self):
+        self.statements = []
+        self.copied = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def execute(self, sql_string, parameters=None):
+        self.statements.append((sql_string, parameters))
+
+    def copy_expert(self, sql_string, stream):
+        self.statements.append((sql_string, None))
+        self.copied.extend(csv.reader(stream))
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail = False
+
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class ListBuffer(WriteBuffer):
+    # keeps every written batch, fails while the connection is down
+
+    def __init__(self, connection, **kwargs):
+        WriteBuffer.__init__(self, connection, **kwargs)
+        self.batches = []
+
+    def write(self, cursor, rows):
+        if self.connection.fail:
+            raise IOError('connection lost')
+        self.batches.append(sorted(rows))
+
+
+class TestWriteBuffer(unittest.TestCase):
+
+    def test_flush_every_flush_rows(self):
+        buffer = ListBuffer(FakeConnection(), flush_rows=2, flush_interval=60)
+        buffer.add('a', (1,))
+        buffer.add('a', (2,))
+        self.assertEqual(buffer.batches, [])
+        buffer.add('b', (3,))
+        # rows are keyed by url, the last one wins
+        self.assertEqual(buffer.batches, [[('a', 2), ('b', 3)]])
+        self.assertEqual(buffer.connection.commits, 1)
+        self.assertEqual(buffer.written, 2)
+
+    @mock.patch('write_buffer.time.time')
+    def test_flush_after_flush_interval(self, clock):
+        clock.return_value = 1000
+        buffer = ListBuffer(FakeConnection(), flush_rows=100, flush_interval=5)
+        buffer.add('a', (1,))
+        self.assertEqual(buffer.batches, [])
+        clock.return_value = 1005
+        buffer.add('b', (2,))
+        self.assertEqual(buffer.batches, [[('a', 1), ('b', 2)]])
+
+    def test_flush_on_exit(self):
+        with ListBuffer(FakeConnection(), flush_rows=100, flush_interval=60) as buffer:
+            buffer.add('a', (1,))
+        self.assertEqual(buffer.batches, [[('a', 1)]])
+
+    def test_failed_flush_keeps_rows(self):
+        connection = FakeConnection()
+        buffer = ListBuffer(connection, flush_rows=1, flush_interval=60, max_rows=3)
+        connection.fail = True
+        buffer.add('a', (1,))
+        buffer.add('b', (2,))
+        self.assertEqual(connection.rollbacks, 2)
+        self.assertEqual(len(buffer.rows), 2)
+        # past max_rows the error is raised instead of growing the buffer
+        with self.assertRaises(IOError):
+            buffer.add('c', (3,))
+        connection.fail = False
+        buffer.flush()
+        self.assertEqual(buffer.batches, [[('a', 1), ('b', 2), ('c', 3)]])
+        self.assertEqual(buffer.rows, {})
+
+
+class ValidatorBuffer(StagedUpdateBuffer):
+    stage_table = 'validator_stage'
+    columns = ['etag']
+    extra_assignments = ['"fetched_at" = now()']
+
+
+class TestStagedUpdateBuffer(unittest.TestCase):
+
+    def test_only_its_columns(self):
+        buffer = ValidatorBuffer(FakeConnection())
+        buffer.add_values('http://a', {'etag': '"1"'})
+        cursor = FakeCursor()
+        buffer.write(cursor, [('http://a', '"1"')])
+        update = ' '.join(cursor.statements[-1][0].split())
+        self.assertEqual(cursor.copied, [['http://a', '"1"']])
+        self.assertIn('SET "etag" = stage."etag", "fetched_at" = now() FROM "validator_stage"', update)
+
+    def test_product_numbers_parsed(self):
+        buffer = ExhibitorDataBuffer(FakeConnection(), flush_rows=100)
+        product = {column: '' for column in ExhibitorDataBuffer.columns}
+        product.update(number_of_staff='201-500People', registered_capital='5,000,000 YUAN')
+        buffer.add_product('http://a', product)
+        row = dict(zip(buffer.columns, buffer.rows['http://a']))
+        self.assertEqual((row['staff_min'], row['staff_max']), (201, 500))
+        self.assertEqual(row['registered_capital_yuan'], 5000000)
+
+
+class TestCopyRows(unittest.TestCase):
+
+    def test_empty_and_null(self):
+        # COPY csv reads an unquoted empty field as NULL unless NULL is something else
+        cursor = FakeCursor()
+        copy_rows(cursor, 'stage', ['url', 'website', 'staff_min'], [('http://a', '', None)])
+        sql_string, _ = cursor.statements[0]
+        self.assertIn("NULL '{}'".format(COPY_NULL), sql_string)
+        self.assertEqual(cursor.copied, [['http://a', '', COPY_NULL]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import logging
+import threading
+import time
+
+from exhibitor_parser import EXHIBITOR_FIELDS, NUMERIC_COLUMNS, numeric_fields
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DATA_COLUMNS = [key for key, _ in EXHIBITOR_FIELDS]
+NUMERIC_TYPES = dict(NUMERIC_COLUMNS)
+
+# csv.writer writes None and '' alike, None is sent as this marker so an empty
+# field stays '' like db.update_exhibitor stores it
+COPY_NULL = '\\N'
+
+
+def copy_rows(cursor, table, columns, rows):
+    # COPY is the cheapest way to get a batch into postgres, one round-trip per flush
+    stream = io.StringIO()
+    csv.writer(stream, lineterminator='\n').writerows(
+        [COPY_NULL if value is None else value for value in row] for row in rows
+    )
+    stream.seek(0)
+    sql_string = "COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{null}')".format(
+        table=table,
+        columns=', '.join('"{}"'.format(column) for column in columns),
+        null=COPY_NULL,
+    )
+    cursor.copy_expert(sql_string, stream)
+
+
+class WriteBuffer(object):
+    # Collects rows keyed by url and writes them in one transaction when
+    # flush_rows rows are queued or flush_interval seconds have passed.
+    # If the database is unavailable rows are kept, up to max_rows.
+
+    def __init__(self, connection, flush_rows=500, flush_interval=5.0, max_rows=5000):
+        self.connection = connection
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.rows = {}
+        self.lock = threading.RLock()
+        self.last_flush = time.time()
+        self.written = 0
+        self.timer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop_timer()
+        self.flush()
+
+    def add(self, url, row):
+        with self.lock:
+            self.rows[url] = row
+            if len(self.rows) >= self.flush_rows or self.is_due():
+                self.flush()
+
+    def is_due(self):
+        return time.time() - self.last_flush >= self.flush_interval
+
+    def flush(self):
+        with self.lock:
+            self.last_flush = time.time()
+            if not self.rows:
+                return
+            rows = [(url,) + tuple(row) for url, row in self.rows.items()]
+            try:
+                with METRICS.timer('db_write', buffer=type(self).__name__):
+                    with self.connection.cursor() as cursor:
+                        self.write(cursor, rows)
+                    self.connection.commit()
+            except Exception as e:
+                METRICS.increment('db_flush_failures_total', buffer=type(self).__name__)
+                self.connection.rollback()
+                if len(self.rows) >= self.max_rows:
+                    raise
+                logger.warning('Flush of {} rows failed, keeping them: {}'.format(len(rows), e))
+                return
+            self.rows = {}
+            self.written += len(rows)
+            METRICS.increment('db_rows_written_total', len(rows), buffer=type(self).__name__)
+
+    def write(self, cursor, rows):
+        raise NotImplementedError
+
+    def start_timer(self):
+        # flushes a quiet buffer from a background thread
+        def tick():
+            if self.is_due():
+                self.flush()
+            self.start_timer()
+
+        self.timer = threading.Timer(self.flush_interval, tick)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def stop_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+def upsert_links(cursor, rows):
+    # rows are (url, category_id, category_name), the name read from the listing is
+    # kept on the category row so links of an unfinished category have it too
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS "exhibitor_link_stage" (
+            "url" text,
+            "category_id" integer,
+            "category_name" text
+        ) ON COMMIT DELETE ROWS;
+    """)
+    copy_rows(cursor, 'exhibitor_link_stage', ['url', 'category_id', 'category_name'], rows)
+    cursor.execute("""
+        UPDATE "category" SET
+            "name" = stage."category_name"
+        FROM (
+            SELECT DISTINCT ON ("category_id") "category_id", "category_name"
+            FROM "exhibitor_link_stage"
+            WHERE "category_name" IS NOT NULL
+        ) AS stage
+        WHERE "category"."id" = stage."category_id"
+          AND "category"."name" IS DISTINCT FROM stage."category_name";
+    """)
+    cursor.execute("""
+        INSERT INTO "exhibitor" ("url", "category_id")
+        SELECT "url", "category_id"
+        FROM "exhibitor_link_stage"
+        ON CONFLICT ("url")
+        DO
+            UPDATE
+                SET category_id = EXCLUDED.category_id;
+    """)
+
+
+class ExhibitorLinkBuffer(WriteBuffer):
+
+    def add_link(self, link, category_id, category):
+        self.add(link, (category_id, category))
+
+    def write(self, cursor, rows):
+        upsert_links(cursor, rows)
+
+
+class StagedUpdateBuffer(WriteBuffer):
+    # columns of exhibitor rows by url: copied into stage_table and applied in one
+    # UPDATE together with extra_assignments
+    stage_table = None
+    columns = []
+    # stage column types other than text
+    column_types = {}
+    extra_assignments = []
+
+    def add_values(self, url, data):
+        self.add(url, [data[column] for column in self.columns])
+
+    def write(self, cursor, rows):
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS "{table}" (
+                "url" text,
+                {columns}
+            ) ON COMMIT DELETE ROWS;
+        """.format(
+            table=self.stage_table,
+            columns=',\n'.join('"{}" {}'.format(column, self.column_types.get(column, 'text')) for column in self.columns),
+        ))
+        copy_rows(cursor, self.stage_table, ['url'] + self.columns, rows)
+        assignments = ['"{0}" = stage."{0}"'.format(column) for column in self.columns]
+        cursor.execute("""
+            UPDATE "exhibitor" SET
+                {assignments}
+            FROM "{table}" AS stage
+            WHERE "exhibitor"."url" = stage."url";
+        """.format(
+            table=self.stage_table,
+            assignments=',\n'.join(assignments + self.extra_assignments),
+        ))
+
+
+class ExhibitorDataBuffer(StagedUpdateBuffer):
+    stage_table = 'exhibitor_data_stage'
+    columns = DATA_COLUMNS + [column for column, _ in NUMERIC_COLUMNS]
+    column_types = NUMERIC_TYPES
+    # changed_at drives incremental exports, see exporters.py
+    extra_assignments = ['"is_done" = true', '"changed_at" = now()']
+
+    def add_product(self, url, data):
+        # parsed once here, the export reads the numeric columns as they are
+        self.add_values(url, dict(data, **numeric_fields(data)))